@@ -0,0 +1,41 @@
+"""
+Shared building blocks for the RSA and Goldwasser-Micali task programs.
+
+The task scripts (as2634_task1.py, as2634_task2.py, as2634_task4a.py and as2634_task4b.py) import the number theoretic
+routines they need from this package so that every scheme runs on the same implementation.
+
+The schemes and the IND-CCA adversaries can be imported from the package itself:
+
+    from encryption_algorithms import RSA, GoldwasserMicali
+
+Importing the package does no work; each class is imported from its module the first time it is used.
+"""
+import importlib
+
+# maps every name exported by the package to the module defining it
+_EXPORTS = {
+    'RSA': 'encryption_algorithms.rsa',
+    'RSAPrivateKey': 'encryption_algorithms.rsa',
+    'GoldwasserMicali': 'encryption_algorithms.goldwasser_micali',
+    'GoldwasserMicaliPrivateKey': 'encryption_algorithms.goldwasser_micali',
+    'RSAChosenCiphertextAttack': 'encryption_algorithms.attacks',
+    'GoldwasserMicaliChosenCiphertextAttack': 'encryption_algorithms.attacks',
+    'KeyPool': 'encryption_algorithms.key_pool',
+    'KeyStore': 'encryption_algorithms.keystore',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> object:
+    """
+    This function imports an exported class from its module the first time it is used
+
+    :param name: the name of the class
+    :return: the class
+    """
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
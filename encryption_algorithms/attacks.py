@@ -0,0 +1,148 @@
+"""
+Ciphertext modifications showing that Naive RSA and the Goldwasser-Micali scheme are not IND-CCA secure.
+
+Both schemes are homomorphic: multiplying a ciphertext by the encryption of a known value gives a different ciphertext
+whose decryption reveals the original plaintext, so a decryption oracle that refuses only the challenge ciphertext
+still decrypts it.
+"""
+from typing import Callable, Sequence
+
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+from encryption_algorithms.number_theory import modular_inverse, random_unit
+
+
+def modify_rsa_cipher(c: int, e: int, N: int) -> int:
+    """
+    This function modifies the cipher text using Homomorphism property by multiplying it to another cipher text 2^e
+    :param c: initial ciphertext that needs to be modified
+    :param e: public key parameter
+    :param N: the public parameter N
+    :return: the modified ciphertext
+    """
+    # calculating a new ciphertext with m = 2 and then multiplying it with given ciphertext to generate a new
+    # modified cipher text
+    return (modular_exponentiation(2, e, N) * c) % N
+
+
+def get_inverse_of_two(N: int) -> int:
+    """
+    This function calculates the inverse of the plaintext 2 used to modify an RSA ciphertext
+
+    :param N: the public parameter N, which must be odd
+    :return: the multiplicative inverse of 2 mod N
+    """
+    if N % 2 == 0:
+        raise ValueError("2 has no inverse mod an even N")
+    return modular_inverse(2, N)
+
+
+def recover_rsa_plaintext(m1: int, N: int) -> int:
+    """
+    This function nullifies the effect of the plaintext 2 in the decryption of a modified RSA ciphertext
+
+    :param m1: the plaintext m` decrypted from the modified ciphertext c`
+    :param N: the public parameter N
+    :return: the original plaintext message m
+    """
+    return (m1 * get_inverse_of_two(N)) % N
+
+
+def modify_gm_cipher(c: int, N: int) -> int:
+    """
+    This function modifies the cipher text using Homomorphism property by multiplying it to the square of a random
+    element z of (Z/NZ)*, which is an encryption of the bit 0
+    :param c: initial ciphertext that needs to be modified
+    :param N: the public parameter N
+    :return: the modified ciphertext, which decrypts to the same bit as c
+    """
+    z = random_unit(N)
+    return (modular_exponentiation(z, 2, N) * c) % N
+
+
+class RSAChosenCiphertextAttack:
+    """
+    The IND-CCA adversary against Naive RSA for one public key (N, e). The ciphertext 2^e mod N and the inverse of 2
+    mod N are computed once and reused for every ciphertext attacked
+    """
+
+    def __init__(self, N: int, e: int):
+        """
+        :param N: the public parameter N
+        :param e: the encryption exponent
+        """
+        self.N = N
+        self.e = e
+        self.multiplier = modular_exponentiation(2, e, N)
+        self.inverse = get_inverse_of_two(N)
+
+    def modify(self, c: int) -> int:
+        """
+        This function computes the modified ciphertext c` = 2^e . c mod N
+
+        :param c: the challenge ciphertext
+        :return: the modified ciphertext, an encryption of 2m
+        """
+        return (self.multiplier * c) % self.N
+
+    def recover(self, m1: int) -> int:
+        """
+        This function computes the original plaintext m = m` . 2^-1 mod N
+
+        :param m1: the plaintext m` decrypted from the modified ciphertext c`
+        :return: the original plaintext message m
+        """
+        return (m1 * self.inverse) % self.N
+
+    def run(self, c: int, decryption_oracle: Callable[[int], int]) -> int:
+        """
+        This function recovers the plaintext of a ciphertext from a decryption oracle that never sees that ciphertext
+
+        :param c: the challenge ciphertext
+        :param decryption_oracle: the function decrypting any ciphertext other than c
+        :return: the plaintext of c
+        """
+        return self.recover(decryption_oracle(self.modify(c)))
+
+    def run_batch(self, ciphertexts: Sequence[int], decryption_oracle: Callable[[list[int]], list[int]]) -> list[int]:
+        """
+        This function recovers the plaintexts of many ciphertexts under the key with one query of a batch decryption
+        oracle
+
+        :param ciphertexts: the challenge ciphertexts
+        :param decryption_oracle: the function decrypting a list of ciphertexts, none of them a challenge ciphertext
+        :return: the plaintexts in the order of the ciphertexts
+        """
+        multiplier, inverse, N = self.multiplier, self.inverse, self.N
+        plaintexts = decryption_oracle([(multiplier * c) % N for c in ciphertexts])
+        return [(m1 * inverse) % N for m1 in plaintexts]
+
+
+class GoldwasserMicaliChosenCiphertextAttack:
+    """
+    The IND-CCA adversary against the Goldwasser-Micali scheme for one public parameter N
+    """
+
+    def __init__(self, N: int):
+        """
+        :param N: the public parameter N
+        """
+        self.N = N
+
+    def modify(self, c: int) -> int:
+        """
+        This function computes the modified ciphertext c` = c . z^2 mod N for a random z of (Z/NZ)*
+
+        :param c: the challenge ciphertext
+        :return: the modified ciphertext, which decrypts to the same bit as c
+        """
+        return modify_gm_cipher(c, self.N)
+
+    def run(self, c: int, decryption_oracle: Callable[[int], int]) -> int:
+        """
+        This function recovers the plaintext bit of a ciphertext from a decryption oracle that never sees that ciphertext
+
+        :param c: the challenge ciphertext
+        :param decryption_oracle: the function decrypting any ciphertext other than c
+        :return: the plaintext bit of c
+        """
+        return decryption_oracle(self.modify(c))
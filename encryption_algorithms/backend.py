@@ -0,0 +1,366 @@
+"""
+Big integer arithmetic backends for the hot paths of the schemes.
+
+A backend provides the five operations the schemes spend their time in: modexp, modinv, gcd, jacobi and
+is_probable_prime. modular_exponentiation.modular_exponentiation, number_theory.gcd, number_theory.modular_inverse,
+number_theory.jacobi_symbol and the prime search of primes.py call the current backend, so changing the backend
+changes every scheme without touching the code calling them.
+
+    python   the reference implementation on Python integers, always available
+    gmpy2    the GMP library through gmpy2, used when gmpy2 is installed
+
+The backend is chosen when the package is first imported: the environment variable ENCRYPTION_ALGORITHMS_BACKEND
+names it (python, gmpy2 or auto, the default, which prefers gmpy2), and use() switches it at runtime:
+
+    from encryption_algorithms import backend
+    backend.use('python')
+
+Worker processes started by fork inherit the current backend; worker processes started by spawn choose it again from
+the environment variable. Every backend returns Python integers, so keys and results do not depend on the backend.
+check_agreement compares the backends on random and edge-case inputs.
+"""
+import math
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from encryption_algorithms import instrumentation
+
+
+class PythonBackend:
+    """
+    The reference backend on Python integers
+    """
+    name = 'python'
+
+    def modexp(self, base: int, power: int, modulus: int) -> int:
+        """
+        This function calculates base^power mod modulus
+
+        :param base: the value to want to raise to a power
+        :param power: the value of the power; a negative power raises the inverse of the base
+        :param modulus: the modulus of the set Z/nZ in which the result is computed
+        :return: the value of the base raised to the given power reduced mod modulus
+        """
+        # the built-in pow reduces at every step and uses a sliding window internally
+        return pow(base, power, modulus)
+
+    def modinv(self, a: int, n: int) -> int:
+        """
+        This function calculates the multiplicative inverse of a mod n
+
+        :param a: the number to be inverted
+        :param n: the modulus
+        :return: the multiplicative inverse of a mod n, as an element of the set Z/nZ
+        """
+        try:
+            return pow(a, -1, n)
+        except ValueError:
+            raise ValueError(f"{a} has no inverse mod {n}") from None
+
+    def gcd(self, a: int, b: int) -> int:
+        """
+        This function calculates greatest common divisor of two integers
+
+        :param a: the value of the first number
+        :param b: the value of the second number
+        :return: the greatest common divisor of two input params
+        """
+        return math.gcd(a, b)
+
+    def jacobi(self, a: int, n: int) -> int:
+        """
+        This function calculates the Jacobi symbol (a/n) by the binary algorithm based on quadratic reciprocity
+
+        :param a: the value of the number for which the jacobi symbol needs to be computed
+        :param n: the value of the modulus, a positive odd number
+        :return: the jacobi symbol of a w.r.t. n, which is 0 if a and n have a common factor
+        """
+        a = a % n
+        result = 1
+        while a != 0:
+            # removing the factors of two from a; (2/n) = -1 exactly when n = 3 or 5 mod 8
+            twos = (a & -a).bit_length() - 1
+            a >>= twos
+            if twos % 2 == 1 and n % 8 in (3, 5):
+                result = -result
+
+            # by quadratic reciprocity (a/n) = -(n/a) exactly when a = n = 3 mod 4
+            if a % 4 == 3 and n % 4 == 3:
+                result = -result
+            a, n = n % a, a
+
+        # if the last modulus is not 1, a and n had a common factor
+        if n == 1:
+            return result
+        return 0
+
+    def is_probable_prime(self, n: int, rounds: int) -> bool:
+        """
+        This function checks if a number is a probable prime by the Miller-Rabin test
+
+        :param n: the number to be checked
+        :param rounds: the number of Miller-Rabin rounds
+        :return: True if no round found the number to be composite
+        """
+        # primes.py imports this module, so it is imported when first needed
+        from encryption_algorithms.primes import check_by_miller_rabin_test_method
+        return check_by_miller_rabin_test_method(n, rounds) == 1
+
+
+class GMPBackend:
+    """
+    The backend running on the GMP library through gmpy2. Its results are converted back to Python integers
+    """
+    name = 'gmpy2'
+
+    def __init__(self):
+        import gmpy2
+        self._gmpy2 = gmpy2
+
+    def modexp(self, base: int, power: int, modulus: int) -> int:
+        """
+        This function calculates base^power mod modulus with mpz_powm
+
+        :param base: the value to want to raise to a power
+        :param power: the value of the power; a negative power raises the inverse of the base
+        :param modulus: the modulus of the set Z/nZ in which the result is computed
+        :return: the value of the base raised to the given power reduced mod modulus
+        """
+        return int(self._gmpy2.powmod(base, power, modulus))
+
+    def modinv(self, a: int, n: int) -> int:
+        """
+        This function calculates the multiplicative inverse of a mod n with mpz_invert
+
+        :param a: the number to be inverted
+        :param n: the modulus
+        :return: the multiplicative inverse of a mod n, as an element of the set Z/nZ
+        """
+        try:
+            return int(self._gmpy2.invert(a, n))
+        except ZeroDivisionError:
+            raise ValueError(f"{a} has no inverse mod {n}") from None
+
+    def gcd(self, a: int, b: int) -> int:
+        """
+        This function calculates greatest common divisor of two integers with mpz_gcd
+
+        :param a: the value of the first number
+        :param b: the value of the second number
+        :return: the greatest common divisor of two input params
+        """
+        return int(self._gmpy2.gcd(a, b))
+
+    def jacobi(self, a: int, n: int) -> int:
+        """
+        This function calculates the Jacobi symbol (a/n) with mpz_jacobi
+
+        :param a: the value of the number for which the jacobi symbol needs to be computed
+        :param n: the value of the modulus, a positive odd number
+        :return: the jacobi symbol of a w.r.t. n, which is 0 if a and n have a common factor
+        """
+        return self._gmpy2.jacobi(a, n)
+
+    def is_probable_prime(self, n: int, rounds: int) -> bool:
+        """
+        This function checks if a number is a probable prime with mpz_probab_prime_p, which runs trial divisions, a
+        Baillie-PSW test and Miller-Rabin rounds
+
+        :param n: the number to be checked
+        :param rounds: the number of Miller-Rabin rounds
+        :return: True if the number is a probable prime
+        """
+        result = self._gmpy2.is_prime(n, rounds)
+        if instrumentation.recorder is not None:
+            # gmpy2 does not report the rounds it ran: a prime passes all of them, while almost every composite is
+            # rejected by trial division or by the first test
+            instrumentation.recorder.count('primality_rounds', rounds if result else 1)
+        return result
+
+
+# maps the name of every backend to its class
+BACKENDS = {
+    'python': PythonBackend,
+    'gmpy2': GMPBackend,
+}
+
+# the name of the environment variable choosing the backend when the package is imported
+ENVIRONMENT_VARIABLE = 'ENCRYPTION_ALGORITHMS_BACKEND'
+
+
+def get_backend(name: str = 'auto') -> object:
+    """
+    This function creates a backend
+
+    :param name: the name of the backend, a key of BACKENDS, or auto for gmpy2 when it is installed and python otherwise
+    :return: the backend
+    """
+    if name == 'auto':
+        try:
+            return GMPBackend()
+        except ImportError:
+            return PythonBackend()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown arithmetic backend {name!r}; choose one of {', '.join(BACKENDS)} or auto")
+    return BACKENDS[name]()
+
+
+def available_backends() -> list[str]:
+    """
+    This function lists the backends that can be created in this environment
+
+    :return: the names of the backends whose libraries are installed
+    """
+    names = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+# the backend every hot path calls
+current = get_backend(os.environ.get(ENVIRONMENT_VARIABLE, 'auto'))
+
+
+def use(name: str) -> object:
+    """
+    This function makes a backend the current one
+
+    :param name: the name of the backend, a key of BACKENDS, or auto
+    :return: the new current backend
+    """
+    global current
+    current = get_backend(name)
+    return current
+
+
+@contextmanager
+def using(name: str) -> Iterator[object]:
+    """
+    This function makes a backend the current one for the block it wraps and restores the previous one afterwards
+
+    :param name: the name of the backend, a key of BACKENDS, or auto
+    :return: a context manager yielding the backend
+    """
+    global current
+    previous = current
+    try:
+        yield use(name)
+    finally:
+        current = previous
+
+
+def check_agreement(names: list[str] = None, bits: tuple[int, ...] = (8, 64, 512, 2048), rounds: int = 100) -> int:
+    """
+    This function checks that the backends give the same results as the reference backend for every operation, on
+    random operands of every size and on edge cases such as non-invertible numbers and Carmichael numbers
+
+    :param names: the backends to check; every available backend when not given
+    :param bits: the sizes of the random operands
+    :param rounds: the number of random cases of every size
+    :return: the number of results compared
+    """
+    names = available_backends() if names is None else names
+
+    cases = {
+        'modexp': [(0, 0, 1), (5, 0, 7), (0, 5, 7), (3, -1, 7), (12, 3, 1)],
+        'modinv': [(1, 2), (3, 7), (6, 9), (0, 5), (10, 1)],
+        'gcd': [(0, 0), (0, 12), (12, 0), (12, 18), (-12, 18)],
+        'jacobi': [(0, 1), (0, 9), (-1, 7), (2, 15), (6, 9)],
+        # small primes, 1, even numbers, Carmichael numbers and a strong pseudoprime to the base 2
+        'is_probable_prime': [(n, 20) for n in (1, 2, 3, 4, 9, 97, 561, 1105, 2047, 8911, 1 << 61, (1 << 61) - 1)],
+    }
+    for size in bits:
+        for _ in range(rounds):
+            a, b = random.getrandbits(size), random.getrandbits(size)
+            n = random.getrandbits(size) | (1 << (size - 1)) | 1
+            cases['modexp'].append((a, b, n))
+            cases['modinv'].append((a, n))
+            cases['gcd'].append((a, b))
+            cases['jacobi'].append((a, n))
+            cases['is_probable_prime'].append((n, 20))
+
+    # every backend runs as the current one, so that the Miller-Rabin test of the reference also uses its modexp
+    with using('python') as reference:
+        expected = {operation: [_call(getattr(reference, operation), case) for case in arguments]
+                    for operation, arguments in cases.items()}
+
+    compared = 0
+    for name in names:
+        with using(name) as backend:
+            for operation, arguments in cases.items():
+                for case, value in zip(arguments, expected[operation]):
+                    result = _call(getattr(backend, operation), case)
+                    if result != value:
+                        raise AssertionError(f"The {name} backend gives {result!r} for {operation}{case}, the "
+                                             f"reference gives {value!r}")
+                    compared += 1
+    return compared
+
+
+def _call(function, arguments: tuple) -> object:
+    """
+    This function calls an operation of a backend and turns a ValueError into a value that can be compared
+
+    :param function: the operation
+    :param arguments: its arguments
+    :return: the result, with any ValueError replaced by its type
+    """
+    try:
+        return function(*arguments)
+    except ValueError:
+        return ValueError
+
+
+def benchmark_backends(bits: int, rounds: int = 200) -> dict:
+    """
+    This function measures every operation of every available backend on random operands of the given size
+
+    :param bits: the number of bits of the operands
+    :param rounds: the number of operations timed for every operation
+    :return: a dictionary mapping every backend to the average time of every operation in microseconds
+    """
+    operands = [(random.getrandbits(bits), random.getrandbits(bits) | (1 << (bits - 1)) | 1) for _ in range(rounds)]
+    results = {}
+    for name in available_backends():
+        with using(name) as backend:
+            results[name] = _time_operations(backend, operands)
+    return results
+
+
+def _time_operations(backend: object, operands: list[tuple[int, int]]) -> dict:
+    """
+    This function measures every operation of a backend
+
+    :param backend: the backend
+    :param operands: the pairs (a, n) of an operand and an odd modulus
+    :return: a dictionary with the average time of every operation in microseconds
+    """
+    operations = {
+        'modexp': lambda a, n: backend.modexp(a, n - 1, n),
+        'modinv': lambda a, n: _call(backend.modinv, (a, n)),
+        'gcd': backend.gcd,
+        'jacobi': backend.jacobi,
+        'is_probable_prime': lambda a, n: backend.is_probable_prime(n, 5),
+    }
+    timings = {}
+    for operation, function in operations.items():
+        start = time.perf_counter()
+        for a, n in operands:
+            function(a, n)
+        timings[operation] = (time.perf_counter() - start) / len(operands) * 1e6
+    return timings
+
+
+if __name__ == '__main__':
+    print(f"{check_agreement()} results agree across the backends {', '.join(available_backends())}")
+    for bits in (512, 1024, 2048, 4096):
+        for name, timings in benchmark_backends(bits, 200 if bits < 4096 else 50).items():
+            print(f"{bits} bits, {name}: " + ', '.join(f"{operation} {value:.1f} us"
+                                                      for operation, value in timings.items()))
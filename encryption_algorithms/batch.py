@@ -0,0 +1,233 @@
+"""
+Non-interactive batch mode for the RSA, Goldwasser-Micali and IND-CCA programs.
+
+Operations are read as JSON lines and their results are written as JSON lines, one for every input line and in the
+same order. Keys generated by a keygen record stay loaded under their name (the name 'default' when none is given) for
+the records that follow. For example, with the scheme rsa:
+
+    {"op": "keygen", "nu": 1024, "key": "alice"}
+    {"op": "encrypt", "key": "alice", "m": 42}
+    {"op": "decrypt", "key": "alice", "c": 123456789}
+
+Operations of each scheme:
+    rsa: keygen (nu, optionally a fixed e such as 65537) -> N, e; encrypt (m, with a key or N and e) -> c; decrypt (c) -> m
+    gm: keygen (nu) -> N, y; encrypt (m, with a key or N and y) -> c; decrypt (c) -> m
+    rsa-cca: the rsa operations and modify (c, with a key or N and e) -> c, inverse; recover (m, with a key or N) -> m
+    gm-cca: the gm operations and modify (c, with a key or N) -> c
+
+A record may carry an id, which is copied to its result. A record that fails produces a result holding an error and the
+remaining records are still processed.
+"""
+import json
+import sys
+from typing import Callable, Iterable, TextIO
+
+from encryption_algorithms import attacks, goldwasser_micali, rsa
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+
+# the number of bytes of the buffers used for the input and output files
+BUFFER_SIZE = 1 << 20
+
+
+def get_key(record: dict, keys: dict) -> object:
+    """
+    This function finds the key named by a record among the keys loaded so far
+
+    :param record: the operation record
+    :param keys: the loaded keys by name
+    :return: the key
+    """
+    name = record.get('key', 'default')
+    if name not in keys:
+        raise KeyError(f"No key named {name!r} has been generated")
+    return keys[name]
+
+
+def get_public_parameter(record: dict, keys: dict, name: str) -> int:
+    """
+    This function takes a public parameter from the record itself or, when the record does not hold it, from the key
+    named by the record
+
+    :param record: the operation record
+    :param keys: the loaded keys by name
+    :param name: the name of the parameter, e.g. N, e or y
+    :return: the value of the parameter
+    """
+    if name in record:
+        return int(record[name])
+    return getattr(get_key(record, keys), name)
+
+
+def handle_rsa(record: dict, keys: dict) -> dict:
+    """
+    This function performs one operation of the RSA scheme
+
+    :param record: the operation record
+    :param keys: the loaded keys by name, updated by keygen
+    :return: the result of the operation
+    """
+    operation = record['op']
+    if operation == 'keygen':
+        name = record.get('key', 'default')
+        private_key = rsa.generate_keypair(int(record['nu']), public_exponent=int(record.get('e', 0)))
+        keys[name] = private_key
+        return {'key': name, 'N': private_key.N, 'e': private_key.e}
+    if operation == 'encrypt':
+        N = get_public_parameter(record, keys, 'N')
+        e = get_public_parameter(record, keys, 'e')
+        return {'c': modular_exponentiation(int(record['m']), e, N)}
+    if operation == 'decrypt':
+        return {'m': rsa.decrypt(int(record['c']), get_key(record, keys))}
+    raise ValueError(f"Unknown RSA operation {operation!r}")
+
+
+def handle_goldwasser_micali(record: dict, keys: dict) -> dict:
+    """
+    This function performs one operation of the Goldwasser-Micali scheme
+
+    :param record: the operation record
+    :param keys: the loaded keys by name, updated by keygen
+    :return: the result of the operation
+    """
+    operation = record['op']
+    if operation == 'keygen':
+        name = record.get('key', 'default')
+        private_key = goldwasser_micali.generate_keypair(int(record['nu']))
+        keys[name] = private_key
+        return {'key': name, 'N': private_key.N, 'y': private_key.y}
+    if operation == 'encrypt':
+        bit = int(record['m'])
+        if bit not in (0, 1):
+            raise ValueError("The message space is the set {0, 1}")
+        N = get_public_parameter(record, keys, 'N')
+        y = get_public_parameter(record, keys, 'y')
+        return {'c': goldwasser_micali.encrypt(bit, y, N)}
+    if operation == 'decrypt':
+        private_key = get_key(record, keys)
+        c = int(record['c'])
+
+        # GM is secure under the QUADRES assumption. If a ciphertext is generated correctly, it will be in J_N
+        if not goldwasser_micali.check_if_valid_ciphers([c], private_key.N)[0]:
+            raise ValueError("The ciphertext is not an element of J_N")
+        return {'m': goldwasser_micali.decrypt_chunk([c], private_key.p)[0]}
+    raise ValueError(f"Unknown Goldwasser-Micali operation {operation!r}")
+
+
+def handle_rsa_chosen_ciphertext(record: dict, keys: dict) -> dict:
+    """
+    This function performs one operation of the IND-CCA demonstration for Naive RSA, or one operation of the RSA scheme
+
+    :param record: the operation record
+    :param keys: the loaded keys by name, updated by keygen
+    :return: the result of the operation
+    """
+    operation = record['op']
+    if operation == 'modify':
+        N = get_public_parameter(record, keys, 'N')
+        e = get_public_parameter(record, keys, 'e')
+        return {'c': attacks.modify_rsa_cipher(int(record['c']), e, N), 'inverse': attacks.get_inverse_of_two(N)}
+    if operation == 'recover':
+        N = get_public_parameter(record, keys, 'N')
+        return {'m': attacks.recover_rsa_plaintext(int(record['m']), N)}
+    return handle_rsa(record, keys)
+
+
+def handle_goldwasser_micali_chosen_ciphertext(record: dict, keys: dict) -> dict:
+    """
+    This function performs one operation of the IND-CCA demonstration for the Goldwasser-Micali scheme, or one
+    operation of the scheme itself
+
+    :param record: the operation record
+    :param keys: the loaded keys by name, updated by keygen
+    :return: the result of the operation
+    """
+    if record['op'] == 'modify':
+        N = get_public_parameter(record, keys, 'N')
+        return {'c': attacks.modify_gm_cipher(int(record['c']), N)}
+    return handle_goldwasser_micali(record, keys)
+
+
+HANDLERS: dict[str, Callable[[dict, dict], dict]] = {
+    'rsa': handle_rsa,
+    'gm': handle_goldwasser_micali,
+    'rsa-cca': handle_rsa_chosen_ciphertext,
+    'gm-cca': handle_goldwasser_micali_chosen_ciphertext,
+}
+
+
+def process_record(handler: Callable[[dict, dict], dict], record: dict, keys: dict) -> dict:
+    """
+    This function performs one operation and turns an error into a result holding it
+
+    :param handler: the handler of the scheme, a value of HANDLERS
+    :param record: the operation record
+    :param keys: the loaded keys by name, updated by keygen
+    :return: the result of the operation, or a result holding the error; the id of the record is copied to it
+    """
+    try:
+        result = handler(record, keys)
+    except Exception as error:
+        result = {'error': f"{type(error).__name__}: {error}"}
+    if isinstance(record, dict) and 'id' in record:
+        result = {'id': record['id'], **result}
+    return result
+
+
+def run(scheme: str, lines: Iterable[str], destination: TextIO) -> int:
+    """
+    This function processes the operation records of one scheme and writes a result for each of them
+
+    :param scheme: the name of the scheme, a key of HANDLERS
+    :param lines: the JSON lines holding the operation records; blank lines are skipped
+    :param destination: the stream to which the JSON lines holding the results are written
+    :return: the number of records that failed
+    """
+    handler = HANDLERS[scheme]
+    keys = {}
+    failures = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            result = {'error': f"{type(error).__name__}: {error}"}
+        else:
+            result = process_record(handler, record, keys)
+        if 'error' in result:
+            failures += 1
+        destination.write(json.dumps(result) + '\n')
+    return failures
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    This function is the entry point of the batch mode
+
+    :param argv: the command line arguments without the program name
+    :return: the exit status, 1 if any record failed
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Process JSON lines of keygen/encrypt/decrypt/modify operations.")
+    parser.add_argument('scheme', choices=HANDLERS)
+    parser.add_argument('input', nargs='?', default='-', help="the file of operation records; - reads stdin")
+    parser.add_argument('output', nargs='?', default='-', help="the file of results; - writes stdout")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input, 'r', buffering=BUFFER_SIZE)
+    destination = sys.stdout if args.output == '-' else open(args.output, 'w', buffering=BUFFER_SIZE)
+    try:
+        failures = run(args.scheme, source, destination)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if destination is not sys.stdout:
+            destination.close()
+        else:
+            destination.flush()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,432 @@
+"""
+Benchmark suite sweeping the security parameter nu over the operations of every scheme.
+
+For every operation and every nu the suite reports the median and 99th percentile latency, the number of operations
+per second and the peak memory allocated by one operation (measured by tracemalloc in a separate run, so that tracing
+does not slow the timed run). Results are saved as JSON and two result files can be compared to flag regressions:
+
+    python -m encryption_algorithms.benchmark run --nu 64 256 1024 --output before.json
+    python -m encryption_algorithms.benchmark run --nu 64 256 1024 --output after.json
+    python -m encryption_algorithms.benchmark compare before.json after.json
+"""
+import functools
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from encryption_algorithms import attacks, backend, goldwasser_micali, rsa
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+from encryption_algorithms.number_theory import jacobi_symbol
+from encryption_algorithms.primes import generate_prime_number
+
+DEFAULT_NU = (64, 128, 256, 512, 1024, 2048, 4096)
+
+# every operation is timed this many times unless its time budget runs out first
+DEFAULT_ROUNDS = 50
+
+# the number of seconds after which an operation stops being repeated; it is always run at least MINIMUM_ROUNDS times
+TIME_BUDGET = 2.0
+MINIMUM_ROUNDS = 3
+
+# the relative slowdown of the median latency above which compare reports a regression
+DEFAULT_THRESHOLD = 0.10
+
+
+@functools.lru_cache(maxsize=None)
+def get_rsa_key(nu: int) -> rsa.RSAPrivateKey:
+    """
+    This function generates the RSA key shared by the benchmarks of one security parameter
+
+    :param nu: the security parameter
+    :return: the private key
+    """
+    return rsa.generate_keypair(nu)
+
+
+@functools.lru_cache(maxsize=None)
+def get_goldwasser_micali_key(nu: int) -> goldwasser_micali.GoldwasserMicaliPrivateKey:
+    """
+    This function generates the Goldwasser-Micali key shared by the benchmarks of one security parameter
+
+    :param nu: the security parameter
+    :return: the private key
+    """
+    return goldwasser_micali.generate_keypair(nu)
+
+
+def prepare_prime_generation(nu: int) -> Callable[[], object]:
+    """
+    This function prepares the generation of one nu/2-bit prime
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    return lambda: generate_prime_number(nu // 2)
+
+
+def prepare_rsa_keygen(nu: int) -> Callable[[], object]:
+    """
+    This function prepares the RSA Setup algorithm
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    return lambda: rsa.generate_keypair(nu)
+
+
+def prepare_rsa_encrypt(nu: int) -> Callable[[], object]:
+    """
+    This function prepares one RSA encryption
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    private_key = get_rsa_key(nu)
+    m = random.randrange(private_key.N)
+    return lambda: modular_exponentiation(m, private_key.e, private_key.N)
+
+
+def prepare_rsa_decrypt(nu: int) -> Callable[[], object]:
+    """
+    This function prepares one RSA decryption by the Chinese Remainder Theorem
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    private_key = get_rsa_key(nu)
+    c = random.randrange(private_key.N)
+    return lambda: rsa.decrypt(c, private_key)
+
+
+def prepare_rsa_modify(nu: int) -> Callable[[], object]:
+    """
+    This function prepares one modification of an RSA ciphertext by the IND-CCA adversary
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    private_key = get_rsa_key(nu)
+    c = random.randrange(private_key.N)
+    return lambda: attacks.modify_rsa_cipher(c, private_key.e, private_key.N)
+
+
+@functools.lru_cache(maxsize=None)
+def get_small_exponent_rsa_key(nu: int) -> rsa.RSAPrivateKey:
+    """
+    This function generates the RSA key with e = 65537 shared by the benchmarks of one security parameter
+
+    :param nu: the security parameter
+    :return: the private key
+    """
+    return rsa.generate_keypair(nu, public_exponent=rsa.DEFAULT_PUBLIC_EXPONENT)
+
+
+def prepare_small_exponent_rsa_keygen(nu: int) -> Callable[[], object]:
+    """
+    This function prepares the RSA Setup algorithm with e = 65537
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    return lambda: rsa.generate_keypair(nu, public_exponent=rsa.DEFAULT_PUBLIC_EXPONENT)
+
+
+def prepare_small_exponent_rsa_encrypt(nu: int) -> Callable[[], object]:
+    """
+    This function prepares one RSA encryption with e = 65537
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    private_key = get_small_exponent_rsa_key(nu)
+    m = random.randrange(private_key.N)
+    return lambda: modular_exponentiation(m, private_key.e, private_key.N)
+
+
+def prepare_small_exponent_rsa_modify(nu: int) -> Callable[[], object]:
+    """
+    This function prepares one modification of an RSA ciphertext under e = 65537 by the IND-CCA adversary
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    private_key = get_small_exponent_rsa_key(nu)
+    c = random.randrange(private_key.N)
+    return lambda: attacks.modify_rsa_cipher(c, private_key.e, private_key.N)
+
+
+def prepare_goldwasser_micali_keygen(nu: int) -> Callable[[], object]:
+    """
+    This function prepares the Goldwasser-Micali Setup algorithm
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    return lambda: goldwasser_micali.generate_keypair(nu)
+
+
+def prepare_goldwasser_micali_encrypt(nu: int) -> Callable[[], object]:
+    """
+    This function prepares one Goldwasser-Micali encryption of a bit
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    private_key = get_goldwasser_micali_key(nu)
+    return lambda: goldwasser_micali.encrypt(1, private_key.y, private_key.N)
+
+
+def prepare_goldwasser_micali_decrypt(nu: int) -> Callable[[], object]:
+    """
+    This function prepares one Goldwasser-Micali decryption of a bit
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    private_key = get_goldwasser_micali_key(nu)
+    ciphertexts = [goldwasser_micali.encrypt(1, private_key.y, private_key.N)]
+    return lambda: goldwasser_micali.decrypt_chunk(ciphertexts, private_key.p)
+
+
+def prepare_jacobi(nu: int) -> Callable[[], object]:
+    """
+    This function prepares one Jacobi symbol of a Goldwasser-Micali ciphertext w.r.t. N
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    private_key = get_goldwasser_micali_key(nu)
+    c = goldwasser_micali.encrypt(1, private_key.y, private_key.N)
+    return lambda: jacobi_symbol(c, private_key.N)
+
+
+def prepare_goldwasser_micali_modify(nu: int) -> Callable[[], object]:
+    """
+    This function prepares one modification of a Goldwasser-Micali ciphertext by the IND-CCA adversary
+
+    :param nu: the security parameter
+    :return: the function running the operation once
+    """
+    private_key = get_goldwasser_micali_key(nu)
+    c = goldwasser_micali.encrypt(1, private_key.y, private_key.N)
+    return lambda: attacks.modify_gm_cipher(c, private_key.N)
+
+
+# maps the name of every benchmarked operation to the function preparing it for a security parameter nu; the prepared
+# function runs the operation once
+CASES: dict[str, Callable[[int], Callable[[], object]]] = {
+    'primes.generate': prepare_prime_generation,
+    'rsa.keygen': prepare_rsa_keygen,
+    'rsa.encrypt': prepare_rsa_encrypt,
+    'rsa.decrypt': prepare_rsa_decrypt,
+    'rsa.modify': prepare_rsa_modify,
+    'rsa65537.keygen': prepare_small_exponent_rsa_keygen,
+    'rsa65537.encrypt': prepare_small_exponent_rsa_encrypt,
+    'rsa65537.modify': prepare_small_exponent_rsa_modify,
+    'gm.keygen': prepare_goldwasser_micali_keygen,
+    'gm.encrypt': prepare_goldwasser_micali_encrypt,
+    'gm.decrypt': prepare_goldwasser_micali_decrypt,
+    'gm.jacobi': prepare_jacobi,
+    'gm.modify': prepare_goldwasser_micali_modify,
+}
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    This function finds a percentile of sorted values by the nearest-rank method
+
+    :param sorted_values: the values in increasing order
+    :param fraction: the percentile as a fraction, e.g. 0.99
+    :return: the smallest value that at least that fraction of the values does not exceed
+    """
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def measure(operation: Callable[[], object], rounds: int = DEFAULT_ROUNDS, time_budget: float = TIME_BUDGET) -> dict:
+    """
+    This function times an operation and measures the peak memory it allocates
+
+    :param operation: the function running the operation once
+    :param rounds: the largest number of timed runs
+    :param time_budget: the number of seconds after which no further run is started
+    :return: a dictionary with the median and 99th percentile latency in seconds, the operations per second, the peak
+    memory in bytes and the number of timed runs
+    """
+    # one untimed run so that caches and lazily computed tables do not count
+    operation()
+
+    latencies = []
+    deadline = time.perf_counter() + time_budget
+    while len(latencies) < rounds and (len(latencies) < MINIMUM_ROUNDS or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    tracemalloc.start()
+    try:
+        operation()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'median': statistics.median(latencies),
+        'p99': percentile(latencies, 0.99),
+        'ops_per_second': len(latencies) / sum(latencies),
+        'peak_memory': peak,
+        'rounds': len(latencies),
+    }
+
+
+def run_suite(nus: tuple[int, ...] = DEFAULT_NU, cases: list[str] = None, rounds: int = DEFAULT_ROUNDS,
+              time_budget: float = TIME_BUDGET, progress: Callable[[dict], None] = None) -> dict:
+    """
+    This function runs every benchmark case for every security parameter
+
+    :param nus: the security parameters to sweep
+    :param cases: the names of the cases to run, keys of CASES; all of them when not given
+    :param rounds: the largest number of timed runs of every operation
+    :param time_budget: the number of seconds after which an operation is not run again
+    :param progress: a function called with every result as soon as it is measured
+    :return: the results together with a description of the machine and the settings
+    """
+    cases = list(CASES) if cases is None else cases
+    for name in cases:
+        if name not in CASES:
+            raise ValueError(f"Unknown benchmark case {name!r}")
+
+    results = []
+    for nu in nus:
+        for name in cases:
+            result = {'case': name, 'nu': nu, **measure(CASES[name](nu), rounds, time_budget)}
+            results.append(result)
+            if progress is not None:
+                progress(result)
+
+    return {
+        'python': platform.python_version(),
+        'backend': backend.current.name,
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'rounds': rounds,
+        'time_budget': time_budget,
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    This function compares the median latencies of two result sets for every case and nu measured in both
+
+    :param baseline: the results of the reference run
+    :param current: the results of the run being checked
+    :param threshold: the relative slowdown above which a result is a regression, e.g. 0.10 for 10%
+    :return: a dictionary for every case and nu with both medians, the speedup of the current run and whether it is a
+    regression
+    """
+    reference = {(result['case'], result['nu']): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        key = (result['case'], result['nu'])
+        if key not in reference:
+            continue
+        before, after = reference[key]['median'], result['median']
+        rows.append({
+            'case': result['case'],
+            'nu': result['nu'],
+            'baseline': before,
+            'current': after,
+            'speedup': before / after if after else math.inf,
+            'regression': after > before * (1 + threshold),
+        })
+    return rows
+
+
+def format_seconds(seconds: float) -> str:
+    """
+    This function formats a latency with a unit suited to its size
+
+    :param seconds: the latency in seconds
+    :return: the latency in seconds, milliseconds or microseconds
+    """
+    if seconds >= 1:
+        return f'{seconds:.3f} s'
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:.3f} ms'
+    return f'{seconds * 1e6:.1f} us'
+
+
+def print_result(result: dict) -> None:
+    """
+    The function prints one benchmark result on console
+
+    :param result: the result of one case and nu
+    :return: None
+    """
+    print(f"{result['case']:<16} nu = {result['nu']:<5} median {format_seconds(result['median']):>12}  "
+          f"p99 {format_seconds(result['p99']):>12}  {result['ops_per_second']:>12.1f} ops/s  "
+          f"peak {result['peak_memory'] / 1024:>9.1f} KiB  ({result['rounds']} runs)")
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    This function is the entry point of the benchmark suite
+
+    :param argv: the command line arguments without the program name
+    :return: the exit status, 1 if compare found a regression
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the schemes over a sweep of security parameters.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks and save the results")
+    run_parser.add_argument('--nu', type=int, nargs='+', default=list(DEFAULT_NU), help="the security parameters")
+    run_parser.add_argument('--cases', nargs='+', choices=CASES, help="the operations to measure; all by default")
+    run_parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help="the largest number of timed runs")
+    run_parser.add_argument('--time-budget', type=float, default=TIME_BUDGET,
+                            help="the seconds after which an operation is not run again")
+    run_parser.add_argument('--output', help="the JSON file to which the results are written")
+    run_parser.add_argument('--backend', choices=[*backend.BACKENDS, 'auto'],
+                            help="the arithmetic backend; the one chosen at import by default")
+
+    compare_parser = commands.add_parser('compare', help="compare two result files and flag regressions")
+    compare_parser.add_argument('baseline', help="the JSON results of the reference run")
+    compare_parser.add_argument('current', help="the JSON results of the run being checked")
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="the relative slowdown of the median reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        if args.backend:
+            backend.use(args.backend)
+        results = run_suite(tuple(args.nu), args.cases, args.rounds, args.time_budget, print_result)
+        if args.output:
+            with open(args.output, 'w') as destination:
+                json.dump(results, destination, indent=2)
+        return 0
+
+    with open(args.baseline) as source:
+        baseline = json.load(source)
+    with open(args.current) as source:
+        current = json.load(source)
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else ''
+        print(f"{row['case']:<16} nu = {row['nu']:<5} {format_seconds(row['baseline']):>12} -> "
+              f"{format_seconds(row['current']):>12}  x{row['speedup']:.2f}  {flag}")
+    regressions = sum(row['regression'] for row in rows)
+    print(f"{len(rows)} results compared, {regressions} regressions above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Harness running the IND-CCA attack on Naive RSA end to end, as a regression check and a load test of the decryption.
+
+For every key the harness encrypts random messages, hands the ciphertexts to the adversary as challenges, and lets it
+recover them from a decryption oracle that refuses every challenge ciphertext. The oracle is a stand-in for the
+decryption of the task 1 program; the adversary computes 2^e mod N and the inverse of 2 once per key and queries the
+oracle with batches of modified ciphertexts. The harness reports the rate of recovered messages, which must be 1, and
+the throughput of the attack:
+
+    python -m encryption_algorithms.cca_harness --nu 1024 --keys 10 --messages 1000 --workers 4
+"""
+import functools
+import random
+import sys
+import time
+from typing import Iterable, Sequence
+
+from encryption_algorithms import rsa
+from encryption_algorithms.attacks import RSAChosenCiphertextAttack
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+
+# the number of modified ciphertexts in one query of the oracle
+BATCH_SIZE = 256
+
+
+class DecryptionOracle:
+    """
+    The decryption oracle of the IND-CCA game for one RSA key. It decrypts any ciphertext except the challenge
+    ciphertexts and counts the ciphertexts it is asked for
+    """
+
+    def __init__(self, private_key: rsa.RSAPrivateKey, pool: object = None, chunk_size: int = rsa.CHUNK_SIZE):
+        """
+        :param private_key: the private key whose ciphertexts are decrypted
+        :param pool: a multiprocessing pool decrypting the chunks of a query; the chunks are decrypted in this process
+        when not given
+        :param chunk_size: the number of ciphertexts in one chunk
+        """
+        self.private_key = private_key
+        self.pool = pool
+        self.chunk_size = chunk_size
+        self.challenges = set()
+        self.queries = 0
+        self.decryptions = 0
+
+    def add_challenges(self, ciphertexts: Iterable[int]) -> None:
+        """
+        This function adds ciphertexts the oracle refuses to decrypt
+
+        :param ciphertexts: the challenge ciphertexts
+        :return: None
+        """
+        self.challenges.update(ciphertexts)
+
+    def __call__(self, ciphertexts: Sequence[int]) -> list[int]:
+        """
+        This function decrypts a query of ciphertexts
+
+        :param ciphertexts: the ciphertexts to be decrypted, none of them a challenge ciphertext
+        :return: the plain texts in the order of the ciphertexts
+        """
+        self.queries += 1
+        if not self.challenges.isdisjoint(ciphertexts):
+            raise ValueError("The decryption oracle refuses to decrypt a challenge ciphertext")
+        self.decryptions += len(ciphertexts)
+
+        if self.pool is None:
+            return rsa.decrypt_chunk(ciphertexts, self.private_key)
+        chunks = [ciphertexts[i:i + self.chunk_size] for i in range(0, len(ciphertexts), self.chunk_size)]
+        plaintexts = []
+        for chunk in self.pool.map(functools.partial(rsa.decrypt_chunk, private_key=self.private_key), chunks):
+            plaintexts.extend(chunk)
+        return plaintexts
+
+
+def attack_key(private_key: rsa.RSAPrivateKey, messages: int, batch_size: int = BATCH_SIZE,
+               pool: object = None) -> dict:
+    """
+    This function runs the attack on random messages encrypted under one key
+
+    :param private_key: the key of the oracle; the adversary only sees its public part
+    :param messages: the number of messages
+    :param batch_size: the number of modified ciphertexts in one query of the oracle
+    :param pool: a multiprocessing pool decrypting the queries of the oracle
+    :return: a dictionary with the numbers of messages, recovered messages, refused queries and oracle queries, and the
+    seconds spent by the adversary and by the oracle
+    """
+    N, e = private_key.N, private_key.e
+
+    # the plaintexts 0 and 1 are their own ciphertexts, so the messages are drawn from 2 to N - 1
+    plaintexts = [random.randrange(2, N) for _ in range(messages)]
+    ciphertexts = [modular_exponentiation(m, e, N) for m in plaintexts]
+    oracle = DecryptionOracle(private_key, pool)
+    oracle.add_challenges(ciphertexts)
+
+    oracle_seconds = 0.0
+
+    def timed_oracle(query: list[int]) -> list[int]:
+        nonlocal oracle_seconds
+        start = time.perf_counter()
+        try:
+            return oracle(query)
+        finally:
+            oracle_seconds += time.perf_counter() - start
+
+    recovered = refused = 0
+    start = time.perf_counter()
+    # the adversary is created once per key, so 2^e mod N and the inverse of 2 are computed once
+    attack = RSAChosenCiphertextAttack(N, e)
+    for i in range(0, messages, batch_size):
+        batch = ciphertexts[i:i + batch_size]
+        try:
+            results = attack.run_batch(batch, timed_oracle)
+        except ValueError:
+            refused += 1
+            continue
+        recovered += sum(m == expected for m, expected in zip(results, plaintexts[i:i + batch_size]))
+    seconds = time.perf_counter() - start
+
+    return {'messages': messages, 'recovered': recovered, 'refused': refused, 'queries': oracle.queries,
+            'seconds': seconds, 'oracle_seconds': oracle_seconds}
+
+
+def run_harness(nu: int = 1024, keys: int = 10, messages: int = 1000, batch_size: int = BATCH_SIZE, workers: int = 1,
+                public_exponent: int = 0) -> dict:
+    """
+    This function runs the attack against many keys and sums up the results
+
+    :param nu: the security parameter of the keys
+    :param keys: the number of keys
+    :param messages: the number of messages attacked under every key
+    :param batch_size: the number of modified ciphertexts in one query of the oracle
+    :param workers: the number of worker processes of the oracle and of the prime searches; 0 uses one per CPU
+    :param public_exponent: the public exponent of the keys, e.g. 65537; 0 chooses a random e for every key
+    :return: a dictionary with the success rate, the attacks per second, the oracle decryptions per second and the
+    totals of attack_key
+    """
+    totals = {'keys': keys, 'messages': 0, 'recovered': 0, 'refused': 0, 'queries': 0, 'seconds': 0.0,
+              'oracle_seconds': 0.0, 'keygen_seconds': 0.0}
+
+    pool = None
+    if workers != 1:
+        import multiprocessing
+
+        pool = multiprocessing.Pool(workers if workers > 0 else None)
+    try:
+        for _ in range(keys):
+            start = time.perf_counter()
+            private_key = rsa.generate_keypair(nu, workers, public_exponent)
+            totals['keygen_seconds'] += time.perf_counter() - start
+
+            for name, value in attack_key(private_key, messages, batch_size, pool).items():
+                totals[name] += value
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    seconds, oracle_seconds = totals['seconds'], totals['oracle_seconds']
+    totals['success_rate'] = totals['recovered'] / totals['messages'] if totals['messages'] else 0.0
+    totals['attacks_per_second'] = totals['messages'] / seconds if seconds else 0.0
+    totals['decryptions_per_second'] = totals['messages'] / oracle_seconds if oracle_seconds else 0.0
+    return totals
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    This function is the entry point of the harness
+
+    :param argv: the command line arguments without the program name
+    :return: the exit status, 1 if a message was not recovered
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the IND-CCA attack on Naive RSA against a decryption oracle.")
+    parser.add_argument('--nu', type=int, default=1024, help="the security parameter of the keys")
+    parser.add_argument('--keys', type=int, default=10, help="the number of keys")
+    parser.add_argument('--messages', type=int, default=1000, help="the number of messages attacked under every key")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="the ciphertexts in one oracle query")
+    parser.add_argument('--workers', type=int, default=1, help="the worker processes of the oracle; 0 for one per CPU")
+    parser.add_argument('--e', type=int, default=0, help="the public exponent, e.g. 65537; random when not given")
+    args = parser.parse_args(argv)
+
+    result = run_harness(args.nu, args.keys, args.messages, args.batch_size, args.workers, args.e)
+    print(f"{result['recovered']} of {result['messages']} messages recovered under {result['keys']} keys "
+          f"(success rate {result['success_rate']:.2%}), {result['refused']} queries refused")
+    print(f"{result['attacks_per_second']:.1f} attacks/s, {result['queries']} oracle queries, oracle "
+          f"{result['decryptions_per_second']:.1f} decryptions/s, adversary "
+          f"{(result['seconds'] - result['oracle_seconds']) * 1e6 / max(result['messages'], 1):.2f} us per message, "
+          f"keygen {result['keygen_seconds']:.2f} s")
+    return 0 if result['recovered'] == result['messages'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,376 @@
+"""
+Indexed binary container of Goldwasser-Micali ciphertexts, with random-access decryption of any byte range.
+
+Every plaintext bit becomes a full element of Z/NZ, so the ciphertext of a byte string is about N.bit_length() times
+its size; written as decimal integers it is larger still and has to be parsed from the start. The container stores
+every element as a big-endian integer of a fixed width instead, so the element of any plaintext bit is at a known
+offset. The file is a header, the public parameter N, the blocks of elements and a block index:
+
+    header  the magic bytes GMCT, the format version (1 byte), the width of an element in bytes (4 bytes), the number
+            of plaintext bits in a block (4 bytes), the length of the plaintext in bytes (8 bytes), the number of blocks
+            (8 bytes) and the offset of the index (8 bytes)
+    N       the public parameter N as a big-endian integer of the element width
+    blocks  one element for every plaintext bit, most significant bit of the first byte first; every block but the
+            last holds the elements of the same number of plaintext bits
+    index   for every block, its offset (8 bytes), its number of elements (4 bytes) and the CRC-32 of its bytes
+            (4 bytes)
+
+All integers of the format are big-endian. Writing reads the plaintext and writes the blocks one at a time, and reading
+maps the file into memory, so neither holds the whole ciphertext:
+
+    with open('message.bin', 'rb') as source:
+        write_container(source, 'message.gmc', private_key.y, private_key.N)
+    with GMContainer('message.gmc') as container:
+        part = container.decrypt_range(1000, 1016, private_key)
+"""
+import functools
+import mmap
+import os
+import random
+import struct
+import time
+import zlib
+from typing import BinaryIO, Iterator
+
+from encryption_algorithms import goldwasser_micali
+from encryption_algorithms.parallel import imap_bounded
+
+MAGIC = b'GMCT'
+VERSION = 1
+
+# the number of plaintext bits in one block; a multiple of 8, so that every block but the last holds whole bytes
+BLOCK_BITS = 4096
+
+_HEADER = struct.Struct('>4sBIIQQQ')
+_INDEX_ENTRY = struct.Struct('>QII')
+
+
+def element_width(N: int) -> int:
+    """
+    This function calculates the number of bytes of one element
+
+    :param N: the public parameter N
+    :return: the number of bytes needed for any element of Z/NZ
+    """
+    return (N.bit_length() + 7) // 8
+
+
+def read_blocks(source: BinaryIO, size: int) -> Iterator[bytes]:
+    """
+    This function reads a binary stream in blocks of the given size; only the last block can be shorter, even when the
+    stream returns fewer bytes than asked for
+
+    :param source: the stream to be read
+    :param size: the number of bytes in one block
+    :return: an iterator over the blocks
+    """
+    pending = b''
+    while True:
+        chunk = source.read(size - len(pending))
+        if not chunk:
+            break
+        pending += chunk
+        if len(pending) == size:
+            yield pending
+            pending = b''
+    if pending:
+        yield pending
+
+
+def write_container(source: BinaryIO, path: str, y: int, N: int, block_bits: int = BLOCK_BITS,
+                    workers: int = 1) -> int:
+    """
+    The function encrypts a binary stream into a container file, block by block. The file is written next to its
+    destination and moved over it only when complete, so a reader never sees a partly written container
+
+    :param source: the stream holding the plaintext
+    :param path: the path of the container file
+    :param y: the public key
+    :param N: the public parameter N
+    :param block_bits: the number of plaintext bits in one block, a multiple of 8
+    :param workers: the number of worker processes encrypting blocks; 0 uses one per CPU
+    :return: the length of the plaintext in bytes
+    """
+    if block_bits <= 0 or block_bits % 8 != 0:
+        raise ValueError("The number of bits in a block must be a positive multiple of 8")
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    width = element_width(N)
+    bits = (goldwasser_micali.unpack_bits(block) for block in read_blocks(source, block_bits // 8))
+
+    pool = None
+    if workers == 1:
+        encrypted = (goldwasser_micali.encrypt_chunk(block, y, N) for block in bits)
+    else:
+        import multiprocessing
+
+        # every worker is reseeded from the operating system so that forked workers do not draw the same randomness;
+        # at most two blocks per worker are read ahead of the blocks written
+        pool = multiprocessing.Pool(workers, initializer=random.seed)
+        encrypted = imap_bounded(pool, functools.partial(goldwasser_micali.encrypt_chunk, y=y, N=N), bits, 2 * workers)
+
+    temporary_path = f'{path}.tmp'
+    index = []
+    length = 0
+    try:
+        with open(temporary_path, 'wb') as destination:
+            destination.write(bytes(_HEADER.size))
+            destination.write(N.to_bytes(width, 'big'))
+            offset = _HEADER.size + width
+            for ciphertexts in encrypted:
+                data = b''.join([c.to_bytes(width, 'big') for c in ciphertexts])
+                destination.write(data)
+                index.append(_INDEX_ENTRY.pack(offset, len(ciphertexts), zlib.crc32(data)))
+                offset += len(data)
+                length += len(ciphertexts) // 8
+
+            destination.write(b''.join(index))
+            destination.seek(0)
+            destination.write(_HEADER.pack(MAGIC, VERSION, width, block_bits, length, len(index), offset))
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    finally:
+        if pool is not None:
+            pool.terminate()
+    os.replace(temporary_path, path)
+    return length
+
+
+def encrypt_file(source_path: str, destination_path: str, y: int, N: int, block_bits: int = BLOCK_BITS,
+                 workers: int = 1) -> int:
+    """
+    The function encrypts a file into a container file
+
+    :param source_path: the path of the plaintext file
+    :param destination_path: the path of the container file to be written
+    :param y: the public key
+    :param N: the public parameter N
+    :param block_bits: the number of plaintext bits in one block, a multiple of 8
+    :param workers: the number of worker processes encrypting blocks; 0 uses one per CPU
+    :return: the length of the plaintext in bytes
+    """
+    with open(source_path, 'rb') as source:
+        return write_container(source, destination_path, y, N, block_bits, workers)
+
+
+class GMContainer:
+    """
+    A read-only container file mapped into memory. Opening it reads only the header and the block index
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: the path of a container file written by write_container
+        """
+        self.path = path
+        with open(path, 'rb') as source:
+            self._mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_header()
+        except Exception:
+            self._mapped.close()
+            raise
+
+    def __enter__(self) -> 'GMContainer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def close(self) -> None:
+        """
+        This function unmaps the container file
+
+        :return: None
+        """
+        self._mapped.close()
+
+    def read_elements(self, start: int, stop: int) -> list[int]:
+        """
+        This function reads the elements of a range of plaintext bits, from the blocks holding them only
+
+        :param start: the index of the first plaintext bit
+        :param stop: the index after the last plaintext bit
+        :return: the ciphertexts of the bits
+        """
+        if not 0 <= start <= stop <= 8 * self.length:
+            raise ValueError(f"The bits {start} to {stop} are outside the plaintext of {8 * self.length} bits")
+        width, mapped = self.width, self._mapped
+        elements = []
+        while start < stop:
+            block, position = divmod(start, self.block_bits)
+            offset, count = self._index[block][:2]
+            end = min(stop - start + position, count)
+            first = offset + position * width
+            elements.extend(int.from_bytes(mapped[i:i + width], 'big')
+                            for i in range(first, first + (end - position) * width, width))
+            start += end - position
+        return elements
+
+    def decrypt_range(self, start: int, stop: int, private_key: goldwasser_micali.GoldwasserMicaliPrivateKey) -> bytes:
+        """
+        The function decrypts a range of plaintext bytes without reading the rest of the container
+
+        :param start: the index of the first plaintext byte
+        :param stop: the index after the last plaintext byte
+        :param private_key: the private key the container was encrypted for
+        :return: the plaintext bytes of the range
+        """
+        self._check_key(private_key)
+        return goldwasser_micali.pack_bits(goldwasser_micali.decrypt_chunk(self.read_elements(8 * start, 8 * stop),
+                                                                           private_key.p))
+
+    def verify(self) -> None:
+        """
+        This function checks the CRC-32 of every block
+
+        :return: None
+        """
+        for block in range(self.blocks):
+            self._read_block(block)
+
+    def decrypt_stream(self, destination: BinaryIO, private_key: goldwasser_micali.GoldwasserMicaliPrivateKey,
+                       workers: int = 1) -> None:
+        """
+        The function decrypts the whole container block by block, checking the CRC-32 of every block
+
+        :param destination: the stream to which the plaintext is written
+        :param private_key: the private key the container was encrypted for
+        :param workers: the number of worker processes decrypting blocks; 0 uses one per CPU
+        :return: None
+        """
+        self._check_key(private_key)
+        elements = (c for block in range(self.blocks) for c in self._read_block(block))
+        for bits in goldwasser_micali.decrypt_chunks(elements, private_key.p, workers, self.block_bits):
+            destination.write(goldwasser_micali.pack_bits(bits))
+
+    def _read_block(self, block: int) -> list[int]:
+        """
+        This function reads the elements of a block and checks its CRC-32
+
+        :param block: the number of the block
+        :return: the ciphertexts of the block
+        """
+        offset, count, checksum = self._index[block]
+        data = self._mapped[offset:offset + count * self.width]
+        if zlib.crc32(data) != checksum:
+            raise ValueError(f"The block {block} of {self.path} is corrupted")
+        width = self.width
+        return [int.from_bytes(data[i:i + width], 'big') for i in range(0, len(data), width)]
+
+    def _check_key(self, private_key: goldwasser_micali.GoldwasserMicaliPrivateKey) -> None:
+        if private_key.N != self.N:
+            raise ValueError("The container was not encrypted for this key")
+
+    def _read_header(self) -> None:
+        """
+        This function checks the header and reads N and the block index of the container file
+
+        :return: None
+        """
+        size = len(self._mapped)
+        if size < _HEADER.size:
+            raise ValueError("The file is not a Goldwasser-Micali container")
+        magic, version, width, block_bits, length, blocks, index_offset = _HEADER.unpack_from(self._mapped, 0)
+        if magic != MAGIC:
+            raise ValueError("The file is not a Goldwasser-Micali container")
+        if version != VERSION:
+            raise ValueError(f"The container format version {version} is not supported")
+        if width == 0 or block_bits == 0 or block_bits % 8 != 0:
+            raise ValueError("The container header is corrupted")
+        if index_offset + blocks * _INDEX_ENTRY.size > size or _HEADER.size + width > index_offset:
+            raise ValueError("The container is truncated")
+
+        self.width = width
+        self.block_bits = block_bits
+        self.length = length
+        self.blocks = blocks
+        self.N = int.from_bytes(self._mapped[_HEADER.size:_HEADER.size + width], 'big')
+        self._index = [_INDEX_ENTRY.unpack_from(self._mapped, index_offset + i * _INDEX_ENTRY.size)
+                       for i in range(blocks)]
+
+        # every block but the last must be full, otherwise the block of a bit cannot be found by division
+        elements = 0
+        for block, (offset, count, _) in enumerate(self._index):
+            if offset + count * width > index_offset or (count != block_bits and block != blocks - 1):
+                raise ValueError(f"The index entry of the block {block} is corrupted")
+            elements += count
+        if elements != 8 * length:
+            raise ValueError("The block index does not match the length of the plaintext")
+
+
+def decrypt_file(source_path: str, destination_path: str, private_key: goldwasser_micali.GoldwasserMicaliPrivateKey,
+                 workers: int = 1) -> None:
+    """
+    The function decrypts a container file
+
+    :param source_path: the path of the container file
+    :param destination_path: the path of the plaintext file to be written
+    :param private_key: the private key the container was encrypted for
+    :param workers: the number of worker processes decrypting blocks; 0 uses one per CPU
+    :return: None
+    """
+    with GMContainer(source_path) as container, open(destination_path, 'wb') as destination:
+        container.decrypt_stream(destination, private_key, workers)
+
+
+def benchmark_container(private_key: goldwasser_micali.GoldwasserMicaliPrivateKey, directory: str,
+                        size: int = 1 << 14, reads: int = 100, read_size: int = 16) -> dict:
+    """
+    This function measures writing and decrypting a container and decrypting random byte ranges of it
+
+    :param private_key: the key used for encryption and decryption
+    :param directory: the directory in which the files are written
+    :param size: the number of random plaintext bytes
+    :param reads: the number of random ranges decrypted
+    :param read_size: the number of bytes of one range
+    :return: a dictionary with the encryption and decryption throughput in kilobytes per second, the average time of
+    decrypting one range in milliseconds, the size of the container and the size of the same ciphertexts as decimal
+    text in bytes
+    """
+    data = random.randbytes(size)
+    source_path = os.path.join(directory, 'plaintext.bin')
+    path = os.path.join(directory, 'ciphertext.gmc')
+    result_path = os.path.join(directory, 'decrypted.bin')
+    with open(source_path, 'wb') as destination:
+        destination.write(data)
+
+    start = time.perf_counter()
+    encrypt_file(source_path, path, private_key.y, private_key.N)
+    encryption = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decrypt_file(path, result_path, private_key)
+    decryption = time.perf_counter() - start
+    with open(result_path, 'rb') as source:
+        if source.read() != data:
+            raise AssertionError("The decrypted container differs from the plaintext")
+
+    with GMContainer(path) as container:
+        starts = [random.randrange(size - read_size + 1) for _ in range(reads)]
+        start = time.perf_counter()
+        for offset in starts:
+            if container.decrypt_range(offset, offset + read_size, private_key) != data[offset:offset + read_size]:
+                raise AssertionError("A decrypted range differs from the plaintext")
+        random_access = (time.perf_counter() - start) / reads
+        # the decimal text of the elements is estimated from a sample of them
+        sample = container.read_elements(0, min(1024, 8 * size))
+        decimal = sum(len(str(c)) + 1 for c in sample) * 8 * size // len(sample)
+
+    return {'encrypt': size / encryption / 1e3, 'decrypt': size / decryption / 1e3, 'range': random_access * 1e3,
+            'size': os.path.getsize(path), 'decimal_size': decimal}
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        for nu in (512, 1024, 2048):
+            result = benchmark_container(goldwasser_micali.generate_keypair(nu), directory)
+            print(f"nu = {nu}: encryption {result['encrypt']:.1f} kB/s, decryption {result['decrypt']:.1f} kB/s, "
+                  f"16-byte range decrypted in {result['range']:.2f} ms, container {result['size']:,} bytes, "
+                  f"decimal text about {result['decimal_size']:,} bytes")
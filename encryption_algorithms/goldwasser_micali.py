@@ -0,0 +1,424 @@
+"""
+Setup algorithm, private key, bulk encryption and batch decryption of the Goldwasser-Micali scheme.
+"""
+import functools
+import os
+import random
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator, Sequence, Union
+
+from encryption_algorithms import instrumentation
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+from encryption_algorithms.number_theory import (chinese_remainder_theorem, gcd, jacobi_symbol, jacobi_symbols,
+                                                 random_unit)
+from encryption_algorithms.parallel import imap_bounded
+from encryption_algorithms.primes import generate_distinct_prime_numbers
+
+# the number of plaintext bits encrypted together, and the unit of work handed to a worker process
+CHUNK_BITS = 4096
+
+# maps the characters '0' and '1' of a binary representation to the bit values 0 and 1, and back
+_BIT_TABLE = bytes.maketrans(b'01', b'\x00\x01')
+_CHARACTER_TABLE = bytes.maketrans(b'\x00\x01', b'01')
+
+
+@dataclass(frozen=True)
+class GoldwasserMicaliPrivateKey:
+    """
+    The private key of the Goldwasser-Micali scheme together with its public key
+
+    N: the public parameter N = pq
+    y: the public key, a quadratic non residue w.r.t. both p and q
+    p: the first prime, which is all that decryption needs
+    q: the second prime
+    """
+    N: int
+    y: int
+    p: int
+    q: int
+
+
+def legendre_calculation(a: int, p: int) -> int:
+    """
+    This function calculates legendre symbol of the given integer a w.r.t. prime p
+
+    :param a: the value of the number for which legendre symbol needs to be computed
+    :param p: the value of prime number p
+    :return: the legendre symbol of a w.r.t. prime p
+    """
+    power = (p - 1) // 2
+    num = modular_exponentiation(a, power, p)
+
+    # (a/p) = ( a^((p-1)/2) ) mod p, where p - 1 represents -1
+    if num == p - 1 and p > 2:
+        return -1
+    else:
+        return num
+
+
+def generate_keypair(nu: int, workers: int = 0) -> GoldwasserMicaliPrivateKey:
+    """
+    This function is the Setup algorithm of the Goldwasser-Micali scheme. It generates the two nu/2-bit primes, and the
+    integers N and y
+
+    :param nu: the security parameter
+    :param workers: the number of worker processes searching for the primes; 0 chooses from the size of the primes
+    :return: the private key holding N, y, p and q
+    """
+    with instrumentation.phase('gm.primes'):
+        p, q = generate_distinct_prime_numbers(nu // 2, 2, workers)
+
+    with instrumentation.phase('gm.non_residues'):
+        # finding elements which are Quadratic Non Residues w.r.t primes p and q using legendre symbol
+        ya, yb = 0, 0
+
+        # if a legendre symbol of a ya is -1, it means the element y is a Quadratic Non Residue w.r.t. p
+        while legendre_calculation(ya, p) != -1:
+            ya = random.randint(1, p)
+
+        # if a legendre symbol of a yb is -1, it means the element y is a Quadratic Non Residue w.r.t. q
+        while legendre_calculation(yb, q) != -1:
+            yb = random.randint(1, q)
+
+    with instrumentation.phase('gm.crt'):
+        # finding solution to the following two equations using chinese remainder theorem
+        # y = ya mod p
+        # y = yb mod q
+        y = chinese_remainder_theorem(ya, p, yb, q)
+    return GoldwasserMicaliPrivateKey(N=p * q, y=y, p=p, q=q)
+
+
+def check_if_valid_ciphers(ciphertexts: Iterable[int], N: int) -> list[bool]:
+    """
+    This function checks a batch of ciphertexts for decryption. A ciphertext generated correctly is in J_N, i.e. it
+    belongs to (Z/NZ)* and its Jacobi symbol is 1; the Jacobi symbol is 0 for every element outside (Z/NZ)* so no
+    separate gcd is needed
+
+    :param ciphertexts: the ciphertexts that need to be checked
+    :param N: The public parameter N
+    :return: a list holding True for every valid ciphertext, in the order of the ciphertexts
+    """
+    return [symbol == 1 for symbol in jacobi_symbols(ciphertexts, N)]
+
+
+def encrypt(bit: int, y: int, N: int) -> int:
+    """
+    The function encrypts a given plaintext message bit to a ciphertext using GoldWasser Micali scheme
+
+    :param bit: the plain text message which needs to be encrypted
+    :param y: the public key
+    :param N: the public parameter N
+    :return: the ciphertext obtained by encrypting the plaintext bit
+    """
+    # x is a random element of (Z/NZ)*; the ciphertext is x^2 for the bit 0 and y.x^2 for the bit 1
+    x = random_unit(N)
+    c = (x * x) % N
+    if bit:
+        c = (c * y) % N
+    return c
+
+
+def unpack_bits(data: Union[bytes, bytearray, memoryview]) -> bytes:
+    """
+    This function splits a byte string into its bits, most significant bit of the first byte first
+
+    :param data: the bytes to be split
+    :return: a bytes object holding one value 0 or 1 for every bit of the data
+    """
+    data = bytes(data)
+    if not data:
+        return b''
+    return format(int.from_bytes(data, 'big'), f'0{8 * len(data)}b').encode().translate(_BIT_TABLE)
+
+
+def encrypt_chunk(bits: Sequence[int], y: int, N: int) -> list[int]:
+    """
+    This function encrypts a chunk of plaintext bits. The randomness for the whole chunk is drawn at once and split
+    into one residue per bit
+
+    :param bits: the plaintext bits, each 0 or 1
+    :param y: the public key
+    :param N: the public parameter N
+    :return: the list of ciphertexts, one for every bit
+    """
+    # 64 extra random bits for each residue make the bias of reducing mod N negligible
+    width = (N.bit_length() + 64 + 7) // 8
+    randomness = random.randbytes(width * len(bits))
+
+    ciphertexts = []
+    for i, bit in enumerate(bits):
+        x = int.from_bytes(randomness[i * width:(i + 1) * width], 'big') % N
+
+        # a residue sharing a factor with N is not a unit; this almost never happens, so it is simply drawn again
+        if gcd(x, N) != 1:
+            x = random_unit(N)
+        c = (x * x) % N
+        if bit:
+            c = (c * y) % N
+        ciphertexts.append(c)
+    return ciphertexts
+
+
+def encrypt_bits(bits: Sequence[int], y: int, N: int, workers: int = 1, chunk_size: int = CHUNK_BITS) -> list[int]:
+    """
+    The function encrypts a sequence of plaintext bits using GoldWasser Micali scheme, chunk by chunk
+
+    :param bits: the plaintext bits, each 0 or 1
+    :param y: the public key
+    :param N: the public parameter N
+    :param workers: the number of worker processes encrypting chunks; 0 uses one per CPU
+    :param chunk_size: the number of bits in one chunk
+    :return: the list of ciphertexts in the order of the bits
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    chunks = [bits[i:i + chunk_size] for i in range(0, len(bits), chunk_size)]
+
+    if workers == 1 or len(chunks) == 1:
+        results = [encrypt_chunk(chunk, y, N) for chunk in chunks]
+    else:
+        import multiprocessing
+
+        # every worker is reseeded from the operating system so that forked workers do not draw the same randomness
+        with multiprocessing.Pool(workers, initializer=random.seed) as pool:
+            results = pool.starmap(encrypt_chunk, [(chunk, y, N) for chunk in chunks])
+    return [c for chunk in results for c in chunk]
+
+
+def encrypt_bytes(data: Union[bytes, bytearray, memoryview], y: int, N: int, workers: int = 1,
+                  chunk_size: int = CHUNK_BITS) -> list[int]:
+    """
+    The function encrypts a byte string bit by bit using GoldWasser Micali scheme
+
+    :param data: the plaintext bytes
+    :param y: the public key
+    :param N: the public parameter N
+    :param workers: the number of worker processes encrypting chunks; 0 uses one per CPU
+    :param chunk_size: the number of bits in one chunk
+    :return: the list of ciphertexts, eight for every byte, most significant bit first
+    """
+    return encrypt_bits(unpack_bits(data), y, N, workers, chunk_size)
+
+
+def pack_bits(bits: Union[bytes, bytearray]) -> bytes:
+    """
+    This function joins bits into bytes, most significant bit of the first byte first; it is the inverse of unpack_bits
+
+    :param bits: one value 0 or 1 for every bit; the number of bits must be a multiple of 8
+    :return: the packed bytes
+    """
+    if len(bits) % 8 != 0:
+        raise ValueError("The number of bits must be a multiple of 8")
+    if not bits:
+        return b''
+    return int(bytes(bits).translate(_CHARACTER_TABLE), 2).to_bytes(len(bits) // 8, 'big')
+
+
+def decrypt_chunk(ciphertexts: Sequence[int], p: int) -> bytes:
+    """
+    This function decrypts a chunk of ciphertexts. The Legendre symbol (c/p) is computed by quadratic reciprocity on c
+    mod p, which is much cheaper than the exponentiation c^((p-1)/2) mod p
+
+    :param ciphertexts: the ciphertexts to be decrypted
+    :param p: the private component
+    :return: a bytes object holding the plaintext bit 0 or 1 for every ciphertext
+    """
+    bits = bytearray()
+    for c in ciphertexts:
+        symbol = jacobi_symbol(c, p)
+
+        # a quadratic residue mod p decrypts to 0, a non residue to 1 and a multiple of p is not a valid ciphertext
+        if symbol == 0:
+            raise ValueError(f"The ciphertext {c} is not an element of (Z/NZ)*")
+        bits.append(0 if symbol == 1 else 1)
+    return bytes(bits)
+
+
+def decrypt_bits(ciphertexts: Iterable[int], p: int, workers: int = 1, chunk_size: int = CHUNK_BITS) -> Iterator[int]:
+    """
+    The function decrypts ciphertexts to plaintext bits using GoldWasser Micali scheme, chunk by chunk
+
+    :param ciphertexts: the ciphertexts to be decrypted
+    :param p: the private component
+    :param workers: the number of worker processes decrypting chunks; 0 uses one per CPU
+    :param chunk_size: the number of ciphertexts in one chunk
+    :return: an iterator over the plaintext bits in the order of the ciphertexts
+    """
+    for chunk in decrypt_chunks(ciphertexts, p, workers, chunk_size):
+        yield from chunk
+
+
+def decrypt_bytes(ciphertexts: Iterable[int], p: int, workers: int = 1, chunk_size: int = CHUNK_BITS) -> bytes:
+    """
+    The function decrypts ciphertexts produced by encrypt_bytes back to the plaintext bytes
+
+    :param ciphertexts: the ciphertexts to be decrypted, eight for every byte
+    :param p: the private component
+    :param workers: the number of worker processes decrypting chunks; 0 uses one per CPU
+    :param chunk_size: the number of ciphertexts in one chunk
+    :return: the plaintext bytes
+    """
+    return pack_bits(b''.join(decrypt_chunks(ciphertexts, p, workers, chunk_size)))
+
+
+def decrypt_chunks(ciphertexts: Iterable[int], p: int, workers: int = 1,
+                   chunk_size: int = CHUNK_BITS) -> Iterator[bytes]:
+    """
+    This function splits the ciphertexts into chunks and decrypts them, in this process or on a pool of worker
+    processes; the chunks are returned in the order of the ciphertexts either way
+
+    :param ciphertexts: the ciphertexts to be decrypted
+    :param p: the private component
+    :param workers: the number of worker processes decrypting chunks; 0 uses one per CPU
+    :param chunk_size: the number of ciphertexts in one chunk
+    :return: an iterator over the decrypted chunks, each holding one value 0 or 1 for every ciphertext
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    iterator = iter(ciphertexts)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+
+    if workers == 1:
+        for chunk in chunks:
+            yield decrypt_chunk(chunk, p)
+    else:
+        import multiprocessing
+
+        # at most two chunks per worker are read ahead, so a stream of ciphertexts is never held in memory at once
+        with multiprocessing.Pool(workers) as pool:
+            yield from imap_bounded(pool, functools.partial(decrypt_chunk, p=p), chunks, 2 * workers)
+
+
+class GoldwasserMicali:
+    """
+    The Goldwasser-Micali scheme with one key. The key is generated only when asked for, with
+    GoldwasserMicali.generate(nu)
+
+        scheme = GoldwasserMicali.generate(1024)
+        assert scheme.decrypt_bytes(scheme.encrypt_bytes(b'message')) == b'message'
+    """
+
+    def __init__(self, private_key: GoldwasserMicaliPrivateKey):
+        """
+        :param private_key: the key used for encryption and decryption
+        """
+        self.private_key = private_key
+
+    @classmethod
+    def generate(cls, nu: int, workers: int = 0) -> 'GoldwasserMicali':
+        """
+        This function runs the Setup algorithm and returns the scheme with the new key
+
+        :param nu: the security parameter
+        :param workers: the number of worker processes searching for the primes; 0 chooses from the size of the primes
+        :return: the scheme holding the new key
+        """
+        return cls(generate_keypair(nu, workers))
+
+    @property
+    def N(self) -> int:
+        """
+        :return: the public parameter N = pq
+        """
+        return self.private_key.N
+
+    @property
+    def y(self) -> int:
+        """
+        :return: the public key y, a quadratic non residue w.r.t. both p and q
+        """
+        return self.private_key.y
+
+    def encrypt(self, bit: int) -> int:
+        """
+        The function encrypts a given plaintext message bit to a ciphertext
+
+        :param bit: the plain text message which needs to be encrypted, 0 or 1
+        :return: the ciphertext obtained by encrypting the plaintext bit
+        """
+        if bit not in (0, 1):
+            raise ValueError("The message space is the set {0, 1}")
+        return encrypt(bit, self.private_key.y, self.private_key.N)
+
+    def decrypt(self, c: int) -> int:
+        """
+        The function decrypts a cipher text to plain text
+
+        :param c: the ciphertext to be decrypted, an element of J_N
+        :return: the plain text bit for the given cipher text
+        """
+        if not self.is_valid_ciphertext(c):
+            raise ValueError("The ciphertext is not an element of J_N")
+        return decrypt_chunk([c], self.private_key.p)[0]
+
+    def is_valid_ciphertext(self, c: int) -> bool:
+        """
+        This function checks that a ciphertext is in J_N, as every correctly generated ciphertext is
+
+        :param c: the ciphertext to be checked
+        :return: True if the ciphertext can be decrypted
+        """
+        return check_if_valid_ciphers([c], self.private_key.N)[0]
+
+    def encrypt_bytes(self, data: Union[bytes, bytearray, memoryview], workers: int = 1) -> list[int]:
+        """
+        The function encrypts a byte string bit by bit
+
+        :param data: the plaintext bytes
+        :param workers: the number of worker processes; 0 uses one per CPU
+        :return: the list of ciphertexts, eight for every byte
+        """
+        return encrypt_bytes(data, self.private_key.y, self.private_key.N, workers)
+
+    def decrypt_bytes(self, ciphertexts: Iterable[int], workers: int = 1) -> bytes:
+        """
+        The function decrypts ciphertexts produced by encrypt_bytes back to the plaintext bytes
+
+        :param ciphertexts: the ciphertexts to be decrypted, eight for every byte
+        :param workers: the number of worker processes; 0 uses one per CPU
+        :return: the plaintext bytes
+        """
+        return decrypt_bytes(ciphertexts, self.private_key.p, workers)
+
+
+def benchmark_bulk_encryption(private_key: GoldwasserMicaliPrivateKey, size: int = 4096, workers: int = 1) -> float:
+    """
+    This function measures the throughput of encrypt_bytes
+
+    :param private_key: the key whose public part is used for encryption
+    :param size: the number of random plaintext bytes encrypted
+    :param workers: the number of worker processes
+    :return: the number of plaintext bits encrypted per second
+    """
+    data = random.randbytes(size)
+    start = time.perf_counter()
+    encrypt_bytes(data, private_key.y, private_key.N, workers)
+    return 8 * size / (time.perf_counter() - start)
+
+
+def benchmark_batch_decryption(private_key: GoldwasserMicaliPrivateKey, size: int = 4096, workers: int = 1) -> float:
+    """
+    This function measures the throughput of decrypt_bytes
+
+    :param private_key: the key used for encryption and decryption
+    :param size: the number of random plaintext bytes encrypted and then decrypted
+    :param workers: the number of worker processes
+    :return: the number of ciphertexts decrypted per second
+    """
+    data = random.randbytes(size)
+    ciphertexts = encrypt_bytes(data, private_key.y, private_key.N)
+    start = time.perf_counter()
+    if decrypt_bytes(ciphertexts, private_key.p, workers) != data:
+        raise AssertionError("The decrypted bytes differ from the plaintext")
+    return len(ciphertexts) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    for nu in (512, 1024, 2048, 4096):
+        private_key = generate_keypair(nu)
+        bits_per_second = benchmark_bulk_encryption(private_key)
+        ciphertexts_per_second = benchmark_batch_decryption(private_key, workers=0)
+        print(f"nu = {nu}: {bits_per_second:,.0f} bits encrypted and {ciphertexts_per_second:,.0f} ciphertexts "
+              f"decrypted per second")
@@ -0,0 +1,353 @@
+"""
+Simulator of the IND-CPA game estimating the advantage of an adversary against Naive RSA and Goldwasser-Micali.
+
+In every round the challenger holds the public key, the adversary chooses two messages m0 and m1, the challenger
+encrypts m_b for a random bit b, and the adversary guesses b from the challenge ciphertext. The advantage of the
+adversary is 2 Pr[guess = b] - 1: 0 for blind guessing and 1 for an adversary that always wins. The simulator plays
+the rounds in chunks on a pool of worker processes and yields a running estimate of the advantage with a confidence
+interval as every chunk completes.
+
+    reencrypt  encrypts m0 itself and guesses 0 exactly when the challenge equals it; it always wins against the
+               deterministic Naive RSA and has no advantage against the randomised Goldwasser-Micali scheme
+    jacobi     compares the Jacobi symbol of the challenge with those of the encryptions of m0 and m1; it wins half of
+               the undecided rounds against Naive RSA, but every Goldwasser-Micali ciphertext has the symbol 1
+    random     guesses a random bit, the baseline with no advantage
+
+Every chunk has its own seed derived from the seed of the game, and its rounds draw every random value (the bit b, the
+messages and the randomness of the encryption) from generators seeded with it, so a game played with the same seed
+gives the same estimate on any number of worker processes:
+
+    python -m encryption_algorithms.ind_cpa --scheme rsa --adversary reencrypt --rounds 1000000 --workers 4
+"""
+import math
+import random
+import statistics
+import sys
+import time
+from typing import Iterator
+
+from encryption_algorithms import goldwasser_micali, rsa
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+from encryption_algorithms.number_theory import jacobi_symbol
+
+# the number of rounds played by one task of a worker process
+CHUNK_ROUNDS = 10000
+
+
+class RSAGame:
+    """
+    Naive RSA in the IND-CPA game; the public key is the tuple (N, e) and the messages are elements of Z/NZ
+    """
+
+    @staticmethod
+    def generate(nu: int) -> tuple[int, int]:
+        """
+        :param nu: the security parameter
+        :return: the public key (N, e) of a new key
+        """
+        private_key = rsa.generate_keypair(nu, workers=1)
+        return private_key.N, private_key.e
+
+    @staticmethod
+    def encrypt(m: int, public_key: tuple[int, int]) -> int:
+        """
+        :param m: the message, an element of Z/NZ
+        :param public_key: the public key (N, e)
+        :return: the ciphertext m^e mod N
+        """
+        N, e = public_key
+        return modular_exponentiation(m, e, N)
+
+    @staticmethod
+    def choose_messages(public_key: tuple[int, int], generator: random.Random) -> tuple[int, int]:
+        """
+        :param public_key: the public key (N, e)
+        :param generator: the random generator of the adversary
+        :return: two distinct random elements of Z/NZ other than 0 and 1, whose encryptions are themselves
+        """
+        N = public_key[0]
+        m0 = generator.randrange(2, N)
+        m1 = generator.randrange(2, N - 1)
+        return m0, m1 + (m1 >= m0)
+
+
+class GoldwasserMicaliGame:
+    """
+    The Goldwasser-Micali scheme in the IND-CPA game; the public key is the tuple (N, y) and the messages are the bits
+    """
+
+    @staticmethod
+    def generate(nu: int) -> tuple[int, int]:
+        """
+        :param nu: the security parameter
+        :return: the public key (N, y) of a new key
+        """
+        private_key = goldwasser_micali.generate_keypair(nu, workers=1)
+        return private_key.N, private_key.y
+
+    @staticmethod
+    def encrypt(m: int, public_key: tuple[int, int]) -> int:
+        """
+        :param m: the message bit
+        :param public_key: the public key (N, y)
+        :return: a random encryption of the bit
+        """
+        N, y = public_key
+        return goldwasser_micali.encrypt(m, y, N)
+
+    @staticmethod
+    def choose_messages(public_key: tuple[int, int], generator: random.Random) -> tuple[int, int]:
+        """
+        :param public_key: the public key (N, y)
+        :param generator: the random generator of the adversary
+        :return: the two bits, the only two messages
+        """
+        return 0, 1
+
+
+# maps the name of every scheme to its game
+SCHEMES = {
+    'rsa': RSAGame,
+    'gm': GoldwasserMicaliGame,
+}
+
+
+class RandomGuessAdversary:
+    """
+    The adversary guessing a random bit
+    """
+
+    def choose(self, game: type, public_key: tuple, generator: random.Random) -> tuple[int, int]:
+        """
+        This function chooses the two messages of a round
+
+        :param game: the game of the scheme, a value of SCHEMES
+        :param public_key: the public key of the challenger
+        :param generator: the random generator of the adversary
+        :return: the messages m0 and m1
+        """
+        return game.choose_messages(public_key, generator)
+
+    def guess(self, game: type, public_key: tuple, messages: tuple[int, int], c: int, generator: random.Random) -> int:
+        """
+        This function guesses which of the messages was encrypted
+
+        :param game: the game of the scheme, a value of SCHEMES
+        :param public_key: the public key of the challenger
+        :param messages: the messages m0 and m1
+        :param c: the challenge ciphertext
+        :param generator: the random generator of the adversary
+        :return: the guess of the bit b
+        """
+        return generator.getrandbits(1)
+
+
+class ReencryptionAdversary(RandomGuessAdversary):
+    """
+    The adversary encrypting m0 with the public key and guessing 0 exactly when the challenge ciphertext equals it
+    """
+
+    def guess(self, game: type, public_key: tuple, messages: tuple[int, int], c: int, generator: random.Random) -> int:
+        return 0 if game.encrypt(messages[0], public_key) == c else 1
+
+
+class JacobiAdversary(RandomGuessAdversary):
+    """
+    The adversary comparing the Jacobi symbol of the challenge ciphertext with those of the encryptions of m0 and m1,
+    and guessing a random bit when they are equal
+    """
+
+    def guess(self, game: type, public_key: tuple, messages: tuple[int, int], c: int, generator: random.Random) -> int:
+        N = public_key[0]
+        symbols = [jacobi_symbol(game.encrypt(m, public_key), N) for m in messages]
+        if symbols[0] == symbols[1]:
+            return generator.getrandbits(1)
+        return 0 if jacobi_symbol(c, N) == symbols[0] else 1
+
+
+# maps the name of every adversary to its class
+ADVERSARIES = {
+    'reencrypt': ReencryptionAdversary,
+    'jacobi': JacobiAdversary,
+    'random': RandomGuessAdversary,
+}
+
+
+def generate_public_key(scheme: str, nu: int, seed: int = 0) -> tuple:
+    """
+    This function generates the key of the challenger from a seed, so that a game can be played again
+
+    :param scheme: the name of the scheme, a key of SCHEMES
+    :param nu: the security parameter
+    :param seed: the seed of the key
+    :return: the public key
+    """
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        return SCHEMES[scheme].generate(nu)
+    finally:
+        random.setstate(state)
+
+
+def play_rounds(scheme: str, adversary: str, public_key: tuple, rounds: int, seed: int) -> int:
+    """
+    This function plays rounds of the IND-CPA game; it is the task run by a worker process
+
+    :param scheme: the name of the scheme, a key of SCHEMES
+    :param adversary: the name of the adversary, a key of ADVERSARIES
+    :param public_key: the public key of the challenger
+    :param rounds: the number of rounds
+    :param seed: the seed of the random values of the rounds
+    :return: the number of rounds won by the adversary
+    """
+    game = SCHEMES[scheme]
+    player = ADVERSARIES[adversary]()
+    challenger = random.Random(seed)
+    generator = random.Random(challenger.getrandbits(64))
+
+    # the schemes draw the randomness of encryption from the random module, which is seeded for the chunk and restored
+    state = random.getstate()
+    random.seed(challenger.getrandbits(64))
+    try:
+        wins = 0
+        for _ in range(rounds):
+            messages = player.choose(game, public_key, generator)
+            b = challenger.getrandbits(1)
+            c = game.encrypt(messages[b], public_key)
+            wins += player.guess(game, public_key, messages, c, generator) == b
+        return wins
+    finally:
+        random.setstate(state)
+
+
+def estimate_advantage(wins: int, rounds: int, confidence: float = 0.95) -> dict:
+    """
+    This function estimates the advantage of an adversary from the rounds it won, with the Wilson score interval of
+    the probability of winning
+
+    :param wins: the number of rounds won
+    :param rounds: the number of rounds played
+    :param confidence: the probability that the interval holds the advantage
+    :return: a dictionary with the rounds, the wins, the advantage 2 Pr[win] - 1 and the bounds of its interval
+    """
+    if rounds == 0:
+        return {'rounds': 0, 'wins': 0, 'advantage': 0.0, 'low': -1.0, 'high': 1.0}
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    p = wins / rounds
+    centre = (p + z * z / (2 * rounds)) / (1 + z * z / rounds)
+    margin = z / (1 + z * z / rounds) * math.sqrt(p * (1 - p) / rounds + z * z / (4 * rounds * rounds))
+    return {'rounds': rounds, 'wins': wins, 'advantage': 2 * p - 1,
+            'low': max(-1.0, 2 * (centre - margin) - 1), 'high': min(1.0, 2 * (centre + margin) - 1)}
+
+
+def simulate(scheme: str, adversary: str, public_key: tuple, rounds: int, workers: int = 1,
+             chunk_rounds: int = CHUNK_ROUNDS, seed: int = 0, confidence: float = 0.95) -> Iterator[dict]:
+    """
+    This function plays the IND-CPA game in chunks of rounds, in this process or on a pool of worker processes, and
+    yields the running estimate of the advantage after every chunk
+
+    :param scheme: the name of the scheme, a key of SCHEMES
+    :param adversary: the name of the adversary, a key of ADVERSARIES
+    :param public_key: the public key of the challenger
+    :param rounds: the number of rounds
+    :param workers: the number of worker processes; 0 uses one per CPU
+    :param chunk_rounds: the number of rounds of one task
+    :param seed: the seed from which the seed of every chunk is derived
+    :param confidence: the probability that the interval holds the advantage
+    :return: an iterator over the estimates of estimate_advantage, each also holding the seconds elapsed
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown scheme {scheme!r}")
+    if adversary not in ADVERSARIES:
+        raise ValueError(f"Unknown adversary {adversary!r}")
+
+    seeds = random.Random(seed)
+    tasks = [(scheme, adversary, public_key, min(chunk_rounds, rounds - i), seeds.getrandbits(64))
+             for i in range(0, rounds, chunk_rounds)]
+
+    played = wins = 0
+    start = time.perf_counter()
+    if workers == 1:
+        results = (play_rounds(*task) for task in tasks)
+        for task, won in zip(tasks, results):
+            played, wins = played + task[3], wins + won
+            yield {**estimate_advantage(wins, played, confidence), 'seconds': time.perf_counter() - start}
+        return
+
+    import multiprocessing
+
+    with multiprocessing.Pool(workers if workers > 0 else None) as pool:
+        for count, won in pool.imap_unordered(_play_task, tasks):
+            played, wins = played + count, wins + won
+            yield {**estimate_advantage(wins, played, confidence), 'seconds': time.perf_counter() - start}
+
+
+def _play_task(task: tuple) -> tuple[int, int]:
+    """
+    This function plays the rounds of one task in a worker process
+
+    :param task: the arguments of play_rounds
+    :return: a tuple containing the number of rounds played and the number of rounds won
+    """
+    return task[3], play_rounds(*task)
+
+
+def run_game(scheme: str, adversary: str, nu: int = 256, rounds: int = 100000, workers: int = 1,
+             chunk_rounds: int = CHUNK_ROUNDS, seed: int = 0, confidence: float = 0.95) -> dict:
+    """
+    This function generates a key and plays the IND-CPA game to the end
+
+    :param scheme: the name of the scheme, a key of SCHEMES
+    :param adversary: the name of the adversary, a key of ADVERSARIES
+    :param nu: the security parameter of the key
+    :param rounds: the number of rounds
+    :param workers: the number of worker processes; 0 uses one per CPU
+    :param chunk_rounds: the number of rounds of one task
+    :param seed: the seed of the key and of the rounds
+    :param confidence: the probability that the interval holds the advantage
+    :return: the final estimate of the advantage
+    """
+    public_key = generate_public_key(scheme, nu, seed)
+    estimate = estimate_advantage(0, 0, confidence)
+    for estimate in simulate(scheme, adversary, public_key, rounds, workers, chunk_rounds, seed, confidence):
+        pass
+    return estimate
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    This function is the entry point of the simulator; it prints the running estimate as the chunks complete
+
+    :param argv: the command line arguments without the program name
+    :return: the exit status
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Estimate the IND-CPA advantage of an adversary.")
+    parser.add_argument('--scheme', choices=SCHEMES, default='rsa')
+    parser.add_argument('--adversary', choices=ADVERSARIES, default='reencrypt')
+    parser.add_argument('--nu', type=int, default=256, help="the security parameter of the key")
+    parser.add_argument('--rounds', type=int, default=100000, help="the number of rounds of the game")
+    parser.add_argument('--workers', type=int, default=0, help="the number of worker processes; 0 for one per CPU")
+    parser.add_argument('--chunk-rounds', type=int, default=CHUNK_ROUNDS, help="the rounds of one task")
+    parser.add_argument('--seed', type=int, default=0, help="the seed of the key and of the rounds")
+    parser.add_argument('--confidence', type=float, default=0.95, help="the confidence level of the interval")
+    parser.add_argument('--reports', type=int, default=10, help="the number of running estimates printed")
+    args = parser.parse_args(argv)
+
+    public_key = generate_public_key(args.scheme, args.nu, args.seed)
+    step = max(1, args.rounds // max(1, args.reports))
+    next_report = step
+    for estimate in simulate(args.scheme, args.adversary, public_key, args.rounds, args.workers, args.chunk_rounds,
+                             args.seed, args.confidence):
+        if estimate['rounds'] >= next_report or estimate['rounds'] == args.rounds:
+            next_report = estimate['rounds'] + step
+            print(f"{estimate['rounds']:>10} rounds: advantage {estimate['advantage']:+.4f}, "
+                  f"{args.confidence:.0%} interval [{estimate['low']:+.4f}, {estimate['high']:+.4f}], "
+                  f"{estimate['rounds'] / estimate['seconds']:.0f} rounds/s", flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
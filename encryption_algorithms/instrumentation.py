@@ -0,0 +1,174 @@
+"""
+Opt-in counters and phase timers for the hot paths and the Setup algorithms.
+
+Instrumentation is off by default. The instrumented functions then only check that no recorder is installed, so the
+cost is one global lookup per call. Turning it on installs a Recorder that counts the operations below and times every
+phase of the Setup algorithms:
+
+    with instrumentation.recording() as recorder:
+        rsa.generate_keypair(2048, workers=1)
+    print(recorder.to_prometheus())
+
+Counters:
+    exponentiations         calls of modular_exponentiation
+    modular_multiplications multiplications mod the modulus, estimated for an exponentiation by square and multiply as
+                            one squaring per bit of the power and one multiplication per set bit
+    primality_rounds        Miller-Rabin rounds run
+    candidates_drawn        random starting points of a prime search
+    candidates_sieved       candidates rejected by the sieve of small primes
+    candidates_rejected     candidates rejected by the Miller-Rabin test
+    gcd_calls               calls of number_theory.gcd
+    modular_inverses        calls of number_theory.modular_inverse
+
+Only the work done in this process is recorded; primes searched by worker processes count in the phase timing the
+search but not in the counters.
+"""
+import threading
+import time
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Iterator, Optional
+
+COUNTERS = ('exponentiations', 'modular_multiplications', 'primality_rounds', 'candidates_drawn', 'candidates_sieved',
+            'candidates_rejected', 'gcd_calls', 'modular_inverses')
+
+# the prefix of the names of the metrics in the Prometheus text format
+METRIC_PREFIX = 'encryption_algorithms'
+
+_NO_PHASE = nullcontext()
+
+
+class Recorder:
+    """
+    The counters and phase timings collected while instrumentation is on. Every update holds a lock, so the recorder
+    can be shared with the background thread of a KeyPool
+    """
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.phases: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        This function adds to a counter
+
+        :param name: the name of the counter, one of COUNTERS
+        :param amount: the number added
+        :return: None
+        """
+        with self._lock:
+            self.counters[name] += amount
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        This function times the block it wraps as one run of a phase
+
+        :param name: the name of the phase, e.g. rsa.primes
+        :return: a context manager timing the block
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                phase = self.phases.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+                phase['calls'] += 1
+                phase['seconds'] += seconds
+                phase['max_seconds'] = max(phase['max_seconds'], seconds)
+
+    def reset(self) -> None:
+        """
+        This function sets every counter to zero and forgets every phase
+
+        :return: None
+        """
+        with self._lock:
+            self.counters = dict.fromkeys(COUNTERS, 0)
+            self.phases = {}
+
+    def to_dict(self) -> dict:
+        """
+        This function exports the counters and phase timings
+
+        :return: a dictionary holding a copy of the counters and of the calls, total seconds and longest run of every
+        phase
+        """
+        with self._lock:
+            return {'counters': dict(self.counters),
+                    'phases': {name: dict(phase) for name, phase in self.phases.items()}}
+
+    def to_prometheus(self) -> str:
+        """
+        This function exports the counters and phase timings in the Prometheus text exposition format
+
+        :return: the metrics, one per line
+        """
+        data = self.to_dict()
+        lines = []
+        for name, value in data['counters'].items():
+            metric = f'{METRIC_PREFIX}_{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric} {value}')
+
+        for field, metric_type in (('calls', 'counter'), ('seconds', 'counter'), ('max_seconds', 'gauge')):
+            metric = f'{METRIC_PREFIX}_phase_{field}' + ('_total' if metric_type == 'counter' else '')
+            lines.append(f'# TYPE {metric} {metric_type}')
+            for name, phase in data['phases'].items():
+                lines.append(f'{metric}{{phase="{name}"}} {phase[field]}')
+        return '\n'.join(lines) + '\n'
+
+
+# the recorder collecting the data, or None while instrumentation is off
+recorder: Optional[Recorder] = None
+
+
+def enable(new_recorder: Recorder = None) -> Recorder:
+    """
+    This function turns instrumentation on
+
+    :param new_recorder: the recorder collecting the data; a new one when not given
+    :return: the recorder
+    """
+    global recorder
+    recorder = Recorder() if new_recorder is None else new_recorder
+    return recorder
+
+
+def disable() -> None:
+    """
+    This function turns instrumentation off; the data of the last recorder stays in it
+
+    :return: None
+    """
+    global recorder
+    recorder = None
+
+
+@contextmanager
+def recording(new_recorder: Recorder = None) -> Iterator[Recorder]:
+    """
+    This function turns instrumentation on for the block it wraps and restores the previous recorder afterwards
+
+    :param new_recorder: the recorder collecting the data; a new one when not given
+    :return: a context manager yielding the recorder
+    """
+    global recorder
+    previous = recorder
+    try:
+        yield enable(new_recorder)
+    finally:
+        recorder = previous
+
+
+def phase(name: str) -> AbstractContextManager:
+    """
+    This function times a phase when instrumentation is on and does nothing otherwise
+
+    :param name: the name of the phase
+    :return: a context manager timing the block it wraps
+    """
+    if recorder is None:
+        return _NO_PHASE
+    return recorder.phase(name)
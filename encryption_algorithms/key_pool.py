@@ -0,0 +1,191 @@
+"""
+Pool of pre-generated keys so that a caller does not pay for the Setup algorithm before its first operation.
+
+A KeyPool is built around a Setup function such as rsa.generate_keypair or goldwasser_micali.generate_keypair:
+
+    with KeyPool(rsa.generate_keypair, capacity=8, low_water_mark=2) as pool:
+        pool.warm(1024)
+        private_key = pool.get(1024)
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+
+class KeyPool:
+    """
+    A bounded queue of ready keys for each security parameter nu, refilled by a background thread
+
+    Once the number of ready keys for nu falls to the low-water mark the background thread generates keys until the
+    queue holds capacity keys again. Keys older than max_age seconds are evicted and never served. A Setup algorithm
+    failing in the background thread is counted in the statistics and does not stop the thread; its nu is not refilled
+    again until a get or warm asks for it, and a get that finds the queue empty runs the Setup algorithm itself, so the
+    error reaches the caller.
+    """
+
+    def __init__(self, generate_keypair: Callable[[int], object], capacity: int = 8, low_water_mark: int = 2,
+                 max_age: float = 0.0):
+        """
+        :param generate_keypair: the Setup algorithm, called with the security parameter nu
+        :param capacity: the largest number of ready keys kept for each nu
+        :param low_water_mark: the number of ready keys for nu at or below which the background thread refills
+        :param max_age: the number of seconds after which a ready key is evicted; 0 keeps keys forever
+        """
+        if not 0 <= low_water_mark < capacity:
+            raise ValueError("The low-water mark must be smaller than the capacity")
+
+        self.generate_keypair = generate_keypair
+        self.capacity = capacity
+        self.low_water_mark = low_water_mark
+        self.max_age = max_age
+
+        self._keys: dict[int, deque] = {}
+        self._refilling: set[int] = set()
+        # the values of nu whose Setup algorithm failed in the background thread, not refilled until a get or warm
+        self._failed: set[int] = set()
+        self._statistics = {'hits': 0, 'misses': 0, 'refills': 0, 'evictions': 0, 'refill_errors': 0}
+        self._last_error = None
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def __enter__(self) -> 'KeyPool':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> 'KeyPool':
+        """
+        This function starts the background thread that refills the pool
+
+        :return: the pool itself
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill, name='key-pool-refill', daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """
+        This function stops the background thread; keys that are still ready can be taken with get
+
+        :return: None
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def warm(self, nu: int) -> None:
+        """
+        This function asks the background thread to fill the pool for nu up to its capacity
+
+        :param nu: the security parameter
+        :return: None
+        """
+        with self._condition:
+            keys = self._keys.setdefault(nu, deque())
+            if len(keys) < self.capacity:
+                self._failed.discard(nu)
+                self._refilling.add(nu)
+                self._condition.notify_all()
+
+    def get(self, nu: int) -> object:
+        """
+        This function takes a ready key for nu, or runs the Setup algorithm in the caller if none is ready
+
+        :param nu: the security parameter
+        :return: a key generated by the Setup algorithm for nu
+        """
+        key = None
+        with self._condition:
+            keys = self._keys.setdefault(nu, deque())
+            self._evict(keys)
+
+            if keys:
+                # the oldest key is served first so that keys are used long before they expire
+                key = keys.popleft()[1]
+                self._statistics['hits'] += 1
+            else:
+                self._statistics['misses'] += 1
+
+            if len(keys) <= self.low_water_mark:
+                self._failed.discard(nu)
+                self._refilling.add(nu)
+                self._condition.notify_all()
+
+        if key is None:
+            key = self.generate_keypair(nu)
+        return key
+
+    def statistics(self) -> dict:
+        """
+        This function reports the hits, misses, background refills, evictions and failed background refills of the pool
+
+        :return: a dictionary of the counters together with the number of ready keys for each nu and the last exception
+        raised by the Setup algorithm in the background thread, None if it never failed
+        """
+        with self._condition:
+            result = dict(self._statistics)
+            result['last_error'] = self._last_error
+            result['ready'] = {nu: len(keys) for nu, keys in self._keys.items()}
+        return result
+
+    def _evict(self, keys: deque) -> None:
+        """
+        This function removes the expired keys from the front of a queue; the caller must hold the lock
+
+        :param keys: the queue of (creation time, key) pairs of one nu, oldest first
+        :return: None
+        """
+        if self.max_age <= 0:
+            return
+        oldest = time.monotonic() - self.max_age
+        while keys and keys[0][0] < oldest:
+            keys.popleft()
+            self._statistics['evictions'] += 1
+
+    def _refill(self) -> None:
+        """
+        This function is run by the background thread. It generates keys for every nu whose queue fell to the low-water
+        mark until the queue is full again
+
+        :return: None
+        """
+        while True:
+            with self._condition:
+                while not self._closed and not self._refilling:
+                    # waking up regularly when keys expire so that expired keys are replaced
+                    self._condition.wait(self.max_age or None)
+                    for nu, keys in self._keys.items():
+                        self._evict(keys)
+                        if len(keys) <= self.low_water_mark and nu not in self._failed:
+                            self._refilling.add(nu)
+                if self._closed:
+                    return
+                nu = next(iter(self._refilling))
+
+            # the Setup algorithm runs without the lock so that callers can take keys meanwhile
+            try:
+                key = self.generate_keypair(nu)
+            except Exception as error:
+                # nu is refilled again only when a get or warm asks for it, so a failing Setup algorithm is not
+                # retried in a busy loop
+                with self._condition:
+                    self._statistics['refill_errors'] += 1
+                    self._last_error = error
+                    self._refilling.discard(nu)
+                    self._failed.add(nu)
+                continue
+
+            with self._condition:
+                keys = self._keys[nu]
+                if len(keys) < self.capacity:
+                    keys.append((time.monotonic(), key))
+                    self._statistics['refills'] += 1
+                if len(keys) >= self.capacity:
+                    self._refilling.discard(nu)
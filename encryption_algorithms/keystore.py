@@ -0,0 +1,271 @@
+"""
+Persistent store of RSA and Goldwasser-Micali private keys in a compact binary file, loaded through a memory map.
+
+The file is a header, the key records and an index:
+
+    header  the magic bytes KEYS, the format version (1 byte), the number of keys (4 bytes) and the offset of the
+            index (8 bytes)
+    record  the kind of key (1 byte) followed by every field of the key as a 4-byte length and the big-endian bytes
+            of the number, in the order of the fields of the private key class
+    index   for every key, the length of its id (2 bytes), the id in UTF-8, the offset of its record (8 bytes) and the
+            length of its record (4 bytes)
+
+All integers of the format are big-endian. Opening a store reads only the header and the index; a record is decoded
+the first time its key is asked for, so a store of thousands of keys opens in milliseconds:
+
+    write_keystore('keys.bin', {'alice': rsa.generate_keypair(2048), 'bob': goldwasser_micali.generate_keypair(1024)})
+    with KeyStore('keys.bin') as store:
+        private_key = store['alice']
+"""
+import dataclasses
+import mmap
+import os
+import struct
+import time
+from typing import Iterator, Mapping
+
+from encryption_algorithms import goldwasser_micali, rsa
+
+MAGIC = b'KEYS'
+VERSION = 1
+
+_HEADER = struct.Struct('>4sBIQ')
+_ID_LENGTH = struct.Struct('>H')
+_INDEX_ENTRY = struct.Struct('>QI')
+_FIELD_LENGTH = struct.Struct('>I')
+
+# maps the kind byte of a record to the private key class it holds
+KINDS = {
+    1: rsa.RSAPrivateKey,
+    2: goldwasser_micali.GoldwasserMicaliPrivateKey,
+}
+
+
+def serialize_key(private_key: object) -> bytes:
+    """
+    This function encodes a private key as a record of the keystore format
+
+    :param private_key: an RSA or Goldwasser-Micali private key
+    :return: the record holding the kind of the key and its fields
+    """
+    for kind, key_class in KINDS.items():
+        if type(private_key) is key_class:
+            break
+    else:
+        raise TypeError(f"Keys of type {type(private_key).__name__} cannot be stored")
+
+    parts = [bytes([kind])]
+    for field in dataclasses.fields(key_class):
+        value = getattr(private_key, field.name)
+        if value < 0:
+            raise ValueError(f"The field {field.name} of a key cannot be negative")
+        data = value.to_bytes((value.bit_length() + 7) // 8, 'big')
+        parts.append(_FIELD_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+
+def deserialize_key(record: bytes) -> object:
+    """
+    This function decodes a record of the keystore format
+
+    :param record: the record written by serialize_key
+    :return: the private key
+    """
+    if not record or record[0] not in KINDS:
+        raise ValueError("The record does not hold a known kind of key")
+    key_class = KINDS[record[0]]
+
+    values = {}
+    offset = 1
+    for field in dataclasses.fields(key_class):
+        if offset + _FIELD_LENGTH.size > len(record):
+            raise ValueError("The record is truncated")
+        length, = _FIELD_LENGTH.unpack_from(record, offset)
+        offset += _FIELD_LENGTH.size
+        if offset + length > len(record):
+            raise ValueError("The record is truncated")
+        values[field.name] = int.from_bytes(record[offset:offset + length], 'big')
+        offset += length
+    if offset != len(record):
+        raise ValueError("The record holds more data than its key")
+    return key_class(**values)
+
+
+def write_keystore(path: str, keys: Mapping[str, object]) -> None:
+    """
+    The function writes keys to a keystore file. The file is written next to its destination and moved over it only
+    when complete, so a reader never sees a partly written store
+
+    :param path: the path of the keystore file
+    :param keys: the private keys by id
+    :return: None
+    """
+    temporary_path = f'{path}.tmp'
+    index = []
+    try:
+        with open(temporary_path, 'wb') as destination:
+            destination.write(bytes(_HEADER.size))
+            offset = _HEADER.size
+            for key_id, private_key in keys.items():
+                record = serialize_key(private_key)
+                destination.write(record)
+                index.append((key_id.encode('utf-8'), offset, len(record)))
+                offset += len(record)
+
+            for encoded_id, record_offset, length in index:
+                if len(encoded_id) > 0xFFFF:
+                    raise ValueError("A key id is longer than 65535 bytes")
+                destination.write(_ID_LENGTH.pack(len(encoded_id)) + encoded_id)
+                destination.write(_INDEX_ENTRY.pack(record_offset, length))
+
+            destination.seek(0)
+            destination.write(_HEADER.pack(MAGIC, VERSION, len(index), offset))
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    os.replace(temporary_path, path)
+
+
+class KeyStore:
+    """
+    A read-only keystore file mapped into memory. Keys are decoded when first asked for and kept afterwards
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: the path of a keystore file written by write_keystore
+        """
+        self.path = path
+        with open(path, 'rb') as source:
+            self._mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._index = self._read_index()
+        except Exception:
+            self._mapped.close()
+            raise
+        self._keys = {}
+
+    def __enter__(self) -> 'KeyStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key_id: str) -> bool:
+        return key_id in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __getitem__(self, key_id: str) -> object:
+        return self.get(key_id)
+
+    def close(self) -> None:
+        """
+        This function unmaps the keystore file; keys already decoded stay usable
+
+        :return: None
+        """
+        self._mapped.close()
+
+    def ids(self) -> list[str]:
+        """
+        This function lists the ids of the keys in the store
+
+        :return: the ids in the order the keys were written
+        """
+        return list(self._index)
+
+    def get(self, key_id: str) -> object:
+        """
+        This function decodes the key with the given id
+
+        :param key_id: the id of the key
+        :return: the private key
+        """
+        if key_id not in self._keys:
+            if key_id not in self._index:
+                raise KeyError(f"No key with id {key_id!r} in {self.path}")
+            offset, length = self._index[key_id]
+            self._keys[key_id] = deserialize_key(self._mapped[offset:offset + length])
+        return self._keys[key_id]
+
+    def load_all(self) -> dict[str, object]:
+        """
+        This function decodes every key in the store
+
+        :return: the private keys by id
+        """
+        return {key_id: self.get(key_id) for key_id in self._index}
+
+    def _read_index(self) -> dict[str, tuple[int, int]]:
+        """
+        This function checks the header and reads the index of the keystore file
+
+        :return: the offset and length of the record of every key by id
+        """
+        size = len(self._mapped)
+        if size < _HEADER.size:
+            raise ValueError("The file is not a keystore")
+        magic, version, count, offset = _HEADER.unpack_from(self._mapped, 0)
+        if magic != MAGIC:
+            raise ValueError("The file is not a keystore")
+        if version != VERSION:
+            raise ValueError(f"The keystore format version {version} is not supported")
+
+        index = {}
+        for i in range(count):
+            if offset + _ID_LENGTH.size > size:
+                raise ValueError("The keystore index is truncated")
+            length, = _ID_LENGTH.unpack_from(self._mapped, offset)
+            offset += _ID_LENGTH.size
+            if offset + length + _INDEX_ENTRY.size > size:
+                raise ValueError("The keystore index is truncated")
+            key_id = self._mapped[offset:offset + length].decode('utf-8')
+            offset += length
+            record_offset, record_length = _INDEX_ENTRY.unpack_from(self._mapped, offset)
+            offset += _INDEX_ENTRY.size
+            if record_offset + record_length > size:
+                raise ValueError(f"The record of the key {key_id!r} is outside the file")
+            index[key_id] = (record_offset, record_length)
+        return index
+
+
+def benchmark_keystore(path: str, private_key: object, count: int = 1000) -> dict:
+    """
+    This function measures writing a store of count copies of a key, opening it and decoding every key
+
+    :param path: the path of the keystore file to be written
+    :param private_key: the key stored under every id
+    :param count: the number of keys in the store
+    :return: a dictionary with the times in milliseconds and the size of the file in bytes
+    """
+    keys = {f'key-{i}': private_key for i in range(count)}
+
+    start = time.perf_counter()
+    write_keystore(path, keys)
+    writing = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with KeyStore(path) as store:
+        opening = time.perf_counter() - start
+        loaded = store.load_all()
+    loading = time.perf_counter() - start
+
+    if loaded != keys:
+        raise AssertionError("The keys read from the store differ from the keys written")
+    return {'write': writing * 1e3, 'open': opening * 1e3, 'load': loading * 1e3, 'size': os.path.getsize(path)}
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        for nu in (1024, 2048):
+            result = benchmark_keystore(os.path.join(directory, 'keys.bin'), rsa.generate_keypair(nu))
+            print(f"nu = {nu}: 1000 keys written in {result['write']:.1f} ms, opened in {result['open']:.1f} ms, "
+                  f"decoded in {result['load']:.1f} ms, {result['size']} bytes")
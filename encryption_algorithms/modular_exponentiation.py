@@ -0,0 +1,202 @@
+"""
+Modular exponentiation engine shared by the RSA and Goldwasser-Micali programs.
+
+Every method reduces modulo the modulus after each multiplication, so the size of the intermediate values never
+exceeds twice the size of the modulus and the cost of one exponentiation is polynomial in the security parameter nu.
+The pure Python variants (square and multiply, sliding window and Montgomery) are kept as references and can be
+compared against the built-in pow(b, e, m) with benchmark_modular_exponentiation.
+"""
+import random
+import time
+
+from encryption_algorithms import backend, instrumentation
+
+
+def modular_exponentiation(base: int, power: int, modulus: int) -> int:
+    """
+    This is the function every scheme uses to calculate base^power mod modulus
+
+    :param base: the value to want to raise to a power
+    :param power: the value of the power
+    :param modulus: the modulus of the set Z/nZ in which the result is computed
+    :return: the value of the base raised to the given power reduced mod modulus
+    """
+    if instrumentation.recorder is not None:
+        instrumentation.recorder.count('exponentiations')
+        instrumentation.recorder.count('modular_multiplications', max(0, power.bit_length() + power.bit_count() - 1))
+
+    # the current arithmetic backend: the built-in pow, or GMP when gmpy2 is installed
+    return backend.current.modexp(base, power, modulus)
+
+
+def square_and_multiply_exponentiation(base: int, power: int, modulus: int) -> int:
+    """
+    This function calculates base^power mod modulus by right-to-left binary exponentiation
+
+    :param base: the value to want to raise to a power
+    :param power: the value of the power, must not be negative
+    :param modulus: the modulus of the set Z/nZ in which the result is computed
+    :return: the value of the base raised to the given power reduced mod modulus
+    """
+    if power < 0:
+        raise ValueError("The power must not be negative")
+
+    result = 1 % modulus
+    base = base % modulus
+
+    # each bit of the power either multiplies the result by the current square or skips it
+    while power > 0:
+        if power & 1:
+            result = (result * base) % modulus
+        base = (base * base) % modulus
+        power >>= 1
+    return result
+
+
+def choose_window_size(bits: int) -> int:
+    """
+    This function chooses the window size for the sliding window method from the bit length of the power
+
+    :param bits: the bit length of the power
+    :return: the number of bits in one window
+    """
+    # larger windows save multiplications but need a larger table of precomputed odd powers
+    if bits <= 24:
+        return 1
+    if bits <= 80:
+        return 3
+    if bits <= 240:
+        return 4
+    if bits <= 672:
+        return 5
+    return 6
+
+
+def sliding_window_exponentiation(base: int, power: int, modulus: int, window_size: int = 0) -> int:
+    """
+    This function calculates base^power mod modulus by the left-to-right sliding window method
+
+    :param base: the value to want to raise to a power
+    :param power: the value of the power, must not be negative
+    :param modulus: the modulus of the set Z/nZ in which the result is computed
+    :param window_size: the number of bits in one window; chosen from the size of the power when 0
+    :return: the value of the base raised to the given power reduced mod modulus
+    """
+    if power < 0:
+        raise ValueError("The power must not be negative")
+    if window_size <= 0:
+        window_size = choose_window_size(power.bit_length())
+
+    # precomputing the odd powers base^1, base^3, ..., base^(2^w - 1)
+    base = base % modulus
+    square = (base * base) % modulus
+    odd_powers = [base]
+    for _ in range(1, 1 << (window_size - 1)):
+        odd_powers.append((odd_powers[-1] * square) % modulus)
+
+    result = 1 % modulus
+    i = power.bit_length() - 1
+    while i >= 0:
+        # a zero bit only squares the result
+        if not (power >> i) & 1:
+            result = (result * result) % modulus
+            i -= 1
+            continue
+
+        # finding the longest window ending in a one bit and consuming it with a single table multiplication
+        j = max(i - window_size + 1, 0)
+        while not (power >> j) & 1:
+            j += 1
+        for _ in range(i - j + 1):
+            result = (result * result) % modulus
+        window = (power >> j) & ((1 << (i - j + 1)) - 1)
+        result = (result * odd_powers[window >> 1]) % modulus
+        i = j - 1
+    return result
+
+
+def montgomery_reduction(t: int, modulus: int, modulus_inverse: int, r_bits: int) -> int:
+    """
+    This function computes t * R^-1 mod modulus where R = 2^r_bits without dividing by the modulus
+
+    :param t: the value to be reduced, smaller than modulus * R
+    :param modulus: the odd modulus
+    :param modulus_inverse: the value -modulus^-1 mod R
+    :param r_bits: the bit length of R
+    :return: the reduced value in the range 0..modulus-1
+    """
+    mask = (1 << r_bits) - 1
+    m = ((t & mask) * modulus_inverse) & mask
+    u = (t + m * modulus) >> r_bits
+    if u >= modulus:
+        return u - modulus
+    return u
+
+
+def montgomery_exponentiation(base: int, power: int, modulus: int) -> int:
+    """
+    This function calculates base^power mod modulus with every multiplication done in Montgomery form
+
+    :param base: the value to want to raise to a power
+    :param power: the value of the power, must not be negative
+    :param modulus: the modulus of the set Z/nZ in which the result is computed, must be odd
+    :return: the value of the base raised to the given power reduced mod modulus
+    """
+    if power < 0:
+        raise ValueError("The power must not be negative")
+    if modulus % 2 == 0:
+        raise ValueError("Montgomery multiplication needs an odd modulus")
+
+    r_bits = modulus.bit_length()
+    modulus_inverse = (-pow(modulus, -1, 1 << r_bits)) % (1 << r_bits)
+
+    # mapping the base and the value 1 into Montgomery form i.e. multiplying them by R mod modulus
+    x = ((base % modulus) << r_bits) % modulus
+    result = (1 << r_bits) % modulus
+
+    for bit in bin(power)[2:]:
+        result = montgomery_reduction(result * result, modulus, modulus_inverse, r_bits)
+        if bit == '1':
+            result = montgomery_reduction(result * x, modulus, modulus_inverse, r_bits)
+
+    # leaving Montgomery form
+    return montgomery_reduction(result, modulus, modulus_inverse, r_bits)
+
+
+EXPONENTIATION_METHODS = {
+    'builtin': modular_exponentiation,
+    'square_and_multiply': square_and_multiply_exponentiation,
+    'sliding_window': sliding_window_exponentiation,
+    'montgomery': montgomery_exponentiation,
+}
+
+
+def benchmark_modular_exponentiation(nu: int, rounds: int = 20) -> dict:
+    """
+    This function measures the average time of one exponentiation with a nu-bit odd modulus and a nu-bit power for
+    every method in EXPONENTIATION_METHODS
+
+    :param nu: the bit size of the modulus and of the power
+    :param rounds: the number of exponentiations timed for each method
+    :return: a dictionary mapping the name of each method to its average time in seconds
+    """
+    modulus = random.getrandbits(nu) | (1 << (nu - 1)) | 1
+    inputs = [(random.randrange(2, modulus), random.getrandbits(nu)) for _ in range(rounds)]
+    expected = [pow(base, power, modulus) for base, power in inputs]
+
+    timings = {}
+    for name, method in EXPONENTIATION_METHODS.items():
+        start = time.perf_counter()
+        results = [method(base, power, modulus) for base, power in inputs]
+        timings[name] = (time.perf_counter() - start) / rounds
+
+        # every method must agree with the built-in pow
+        if results != expected:
+            raise AssertionError(f"The {name} method disagrees with the built-in pow")
+    return timings
+
+
+if __name__ == '__main__':
+    for bits in (512, 1024, 2048, 4096):
+        result = benchmark_modular_exponentiation(bits)
+        print(f"nu = {bits}: " + ", ".join(f"{name} {seconds * 1000:.3f} ms" for name, seconds in result.items()))
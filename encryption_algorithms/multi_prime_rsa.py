@@ -0,0 +1,202 @@
+"""
+Multi-prime RSA: the modulus N is the product of k >= 2 distinct primes of about nu/k bits each.
+
+The Setup algorithm searches for k smaller primes instead of two nu/2-bit ones, and decryption computes one
+exponentiation mod each prime with the exponent d mod (p_i - 1) and recombines the k residues by Garner's algorithm.
+An exponentiation costs roughly the cube of the size of its modulus, so k exponentiations with nu/k-bit moduli cost
+about 4/k^2 of the two nu/2-bit ones of the usual Chinese Remainder Theorem decryption. The usual limits on k for
+security are 2 primes below 2048 bits, 3 up to 4096 bits and 4 above.
+"""
+import random
+import time
+from dataclasses import dataclass
+
+from encryption_algorithms import instrumentation
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+from encryption_algorithms.number_theory import (chinese_remainder_theorem_multiple, gcd, get_crt_coefficients,
+                                                 modular_inverse)
+from encryption_algorithms.primes import generate_distinct_prime_numbers
+
+# the smallest number of bits of one prime
+MINIMUM_PRIME_BITS = 16
+
+
+@dataclass(frozen=True)
+class MultiPrimeRSAPrivateKey:
+    """
+    The private key of multi-prime RSA together with its Chinese Remainder Theorem precomputations
+
+    N: the public parameter N, the product of the primes
+    e: the encryption exponent
+    d: the decryption exponent
+    primes: the distinct primes p_1, ..., p_k
+    exponents: the values d mod (p_i - 1)
+    coefficients: the values Garner's algorithm needs, from number_theory.get_crt_coefficients
+    """
+    N: int
+    e: int
+    d: int
+    primes: tuple[int, ...]
+    exponents: tuple[int, ...]
+    coefficients: tuple[int, ...]
+
+
+def get_prime_sizes(nu: int, k: int) -> list[int]:
+    """
+    This function splits the security parameter into the bit sizes of k primes
+
+    :param nu: the security parameter
+    :param k: the number of primes
+    :return: k bit sizes adding up to nu, differing by at most one
+    """
+    if k < 2:
+        raise ValueError("Multi-prime RSA needs at least 2 primes")
+    if nu // k < MINIMUM_PRIME_BITS:
+        raise ValueError(f"The primes of a {nu}-bit modulus split {k} ways would have fewer than "
+                         f"{MINIMUM_PRIME_BITS} bits")
+    sizes = [nu // k] * k
+    for i in range(nu % k):
+        sizes[i] += 1
+    return sizes
+
+
+def generate_primes(nu: int, k: int, workers: int = 0) -> list[int]:
+    """
+    This function generates the k distinct primes of a multi-prime RSA modulus; primes of the same size are searched
+    for together, on a pool of worker processes when workers is not 1
+
+    :param nu: the security parameter
+    :param k: the number of primes
+    :param workers: the number of worker processes searching for the primes; 0 chooses from the size of the primes
+    :return: the primes
+    """
+    sizes = get_prime_sizes(nu, k)
+    primes = []
+
+    # primes of different sizes are always distinct, so each size is a separate search
+    for size in sorted(set(sizes), reverse=True):
+        primes.extend(generate_distinct_prime_numbers(size, sizes.count(size), workers))
+    return primes
+
+
+def generate_keypair(nu: int, k: int = 3, workers: int = 0, public_exponent: int = 0) -> MultiPrimeRSAPrivateKey:
+    """
+    This function is the Setup algorithm of multi-prime RSA. It generates k primes of about nu/k bits, and the integers
+    N, e and d
+
+    :param nu: the security parameter
+    :param k: the number of primes
+    :param workers: the number of worker processes searching for the primes; 0 chooses from the size of the primes
+    :param public_exponent: the public exponent e, odd and at least 3, e.g. 65537; 0 chooses a random e of at least
+    nu/2 bits as the two-prime Setup algorithm does
+    :return: the private key holding N, e, d, the primes and the Chinese Remainder Theorem precomputations
+    """
+    if public_exponent and (public_exponent < 3 or public_exponent % 2 == 0):
+        raise ValueError("The public exponent must be odd and at least 3")
+
+    while True:
+        with instrumentation.phase('rsa.primes'):
+            primes = generate_primes(nu, k, workers)
+        M = 1
+        for p in primes:
+            M *= p - 1
+
+        # a fixed e must be mutually prime to M, otherwise the primes are generated again
+        if not public_exponent or gcd(public_exponent, M) == 1:
+            break
+
+    with instrumentation.phase('rsa.exponents'):
+        e = public_exponent
+        while not e:
+            # generating a random integer e such that gcd(e;M) = 1:
+            candidate = random.randint(1 << ((nu // 2) - 1), M)
+            if gcd(candidate, M) == 1:
+                e = candidate
+        d = modular_inverse(e, M)
+
+    with instrumentation.phase('rsa.crt'):
+        return generate_private_key(primes, e, d)
+
+
+def generate_private_key(primes: list[int], e: int, d: int) -> MultiPrimeRSAPrivateKey:
+    """
+    This function computes the Chinese Remainder Theorem values of a multi-prime private key once, at setup
+
+    :param primes: the distinct primes generated by the Setup algorithm
+    :param e: the encryption exponent
+    :param d: the decryption exponent
+    :return: the private key holding the primes, the exponents d mod (p_i - 1) and the coefficients of Garner's
+    algorithm
+    """
+    if len(set(primes)) != len(primes):
+        raise ValueError("The primes must be distinct")
+    N = 1
+    for p in primes:
+        N *= p
+    return MultiPrimeRSAPrivateKey(N=N, e=e, d=d, primes=tuple(primes), exponents=tuple(d % (p - 1) for p in primes),
+                                   coefficients=tuple(get_crt_coefficients(primes)))
+
+
+def encrypt(m: int, private_key: MultiPrimeRSAPrivateKey) -> int:
+    """
+    The function encrypts a given plaintext message m to a ciphertext using RSA scheme; encryption only needs N and e,
+    so it is the same as for two primes
+
+    :param m: the plain text message which needs to be encrypted, an element of Z/NZ
+    :param private_key: the key whose public part is used
+    :return: the ciphertext obtained by encrypting the plaintext m
+    """
+    return modular_exponentiation(m, private_key.e, private_key.N)
+
+
+def decrypt(c: int, private_key: MultiPrimeRSAPrivateKey) -> int:
+    """
+    The function decrypts a cipher text to plain text using multi-prime RSA and the Chinese Remainder Theorem
+
+    :param c: the ciphertext to be decrypted
+    :param private_key: the private key with its Chinese Remainder Theorem precomputations
+    :return: the plain text for the given cipher text
+    """
+    # one exponentiation mod each prime: m = c^d mod p_i
+    residues = [modular_exponentiation(c % p, exponent, p)
+                for p, exponent in zip(private_key.primes, private_key.exponents)]
+
+    # recombining the k residues into the plaintext mod N
+    return chinese_remainder_theorem_multiple(residues, private_key.primes, private_key.coefficients)
+
+
+def benchmark_multi_prime(nu: int, counts: tuple[int, ...] = (2, 3, 4), keys: int = 3, rounds: int = 50,
+                          workers: int = 1) -> dict:
+    """
+    This function measures the average time of the Setup algorithm and of one decryption for every number of primes
+
+    :param nu: the security parameter
+    :param counts: the numbers of primes k to compare
+    :param keys: the number of keys generated for every k
+    :param rounds: the number of decryptions timed for every k
+    :param workers: the number of worker processes searching for the primes
+    :return: a dictionary mapping every k to its average keygen and decryption times in seconds
+    """
+    results = {}
+    for k in counts:
+        start = time.perf_counter()
+        private_keys = [generate_keypair(nu, k, workers) for _ in range(keys)]
+        keygen = (time.perf_counter() - start) / keys
+
+        private_key = private_keys[0]
+        plaintexts = [random.randrange(private_key.N) for _ in range(rounds)]
+        ciphertexts = [encrypt(m, private_key) for m in plaintexts]
+        start = time.perf_counter()
+        decrypted = [decrypt(c, private_key) for c in ciphertexts]
+        decryption = (time.perf_counter() - start) / rounds
+        if decrypted != plaintexts:
+            raise AssertionError(f"The decryption with {k} primes disagrees with the plaintexts")
+        results[k] = {'keygen': keygen, 'decrypt': decryption}
+    return results
+
+
+if __name__ == '__main__':
+    for nu in (1024, 2048, 4096):
+        result = benchmark_multi_prime(nu, keys=3 if nu < 4096 else 1, rounds=50 if nu < 4096 else 10)
+        print(f"nu = {nu}: " + ", ".join(f"k = {k}: keygen {timing['keygen'] * 1000:.1f} ms, decrypt "
+                                          f"{timing['decrypt'] * 1000:.3f} ms" for k, timing in result.items()))
@@ -0,0 +1,272 @@
+"""
+Number theoretic routines shared by the RSA and Goldwasser-Micali programs.
+"""
+import math
+import random
+import time
+from typing import Iterable, Sequence
+
+from encryption_algorithms import backend, instrumentation
+
+# the extended Euclidean algorithm makes Lehmer steps while the remainders are longer than this; below it, the Python
+# overhead of the single-precision divisions costs more than the big integer arithmetic they save
+LEHMER_BITS = 1024
+
+# the number of leading bits on which Lehmer's algorithm simulates the divisions
+LEHMER_DIGIT_BITS = 62
+
+
+def extended_euclidean_algorithm(a: int, b: int) -> tuple[int, int, int]:
+    """
+    This is the function to get the greatest common divisor between two numbers and also returns inverses for the numbers
+
+    Only the coefficient of a is carried through the divisions; the coefficient of b follows from a.x + b.y = d at the
+    end. While the remainders are longer than LEHMER_BITS, Lehmer's algorithm runs the divisions on the leading
+    LEHMER_DIGIT_BITS bits of the operands and applies them to the full numbers as one 2x2 matrix
+
+    :param a: the value of the first number, not negative
+    :param b: the value of the second number, not negative
+    :return: a tuple containing gcd of two params, multiplicative inverse of the first param and multiplicative inverse
+    of the second param respectively
+    """
+    if a < 0 or b < 0:
+        raise ValueError("The extended Euclidean algorithm needs numbers that are not negative")
+    if b == 0:
+        return a, 1, 0
+
+    r1, r = a, b
+    s1, s = 1, 0
+    while r.bit_length() > LEHMER_BITS:
+        # simulating the divisions on the leading bits; the quotient is exact while both bounds agree on it
+        shift = max(r1.bit_length(), r.bit_length()) - LEHMER_DIGIT_BITS
+        x, y = r1 >> shift, r >> shift
+        A, B, C, D = 1, 0, 0, 1
+        while y + C != 0 and y + D != 0:
+            q = (x + A) // (y + C)
+            if q != (x + B) // (y + D):
+                break
+            A, C = C, A - q * C
+            B, D = D, B - q * D
+            x, y = y, x - q * y
+
+        if B == 0:
+            # the leading bits did not give a single quotient, so one full division is made
+            q, remainder = divmod(r1, r)
+            r1, r = r, remainder
+            s1, s = s, s1 - q * s
+        else:
+            r1, r = A * r1 + B * r, C * r1 + D * r
+            s1, s = A * s1 + B * s, C * s1 + D * s
+
+    # until remainder is not zero this loop continues
+    while r != 0:
+        q, remainder = divmod(r1, r)
+        r1, r = r, remainder
+        s1, s = s, s1 - q * s
+
+    return r1, s1, (r1 - s1 * a) // b
+
+
+def gcd(a: int, b: int) -> int:
+    """
+    This function calculates greatest common divisor of two integers
+
+    :param a: the value of the first number
+    :param b: the value of the second number
+    :return: the greatest common divisor of two input params
+    """
+    if instrumentation.recorder is not None:
+        instrumentation.recorder.count('gcd_calls')
+    return backend.current.gcd(a, b)
+
+
+def modular_inverse(a: int, n: int) -> int:
+    """
+    This function calculates the multiplicative inverse of a mod n directly, as an element of the set Z/nZ
+
+    :param a: the number to be inverted
+    :param n: the modulus
+    :return: the multiplicative inverse of a mod n
+    """
+    if instrumentation.recorder is not None:
+        instrumentation.recorder.count('modular_inverses')
+    return backend.current.modinv(a, n)
+
+
+def get_negative_number_representation(neg: int, n: int) -> int:
+    """
+    This function maps a negative number to find its representation within the set Z/nZ
+
+    :param neg: The negative number to be mapped to Z/nZ
+    :param n: The value of n to generate the set Z/nZ
+    :return: the representation of the negative number from the set Z/nZ
+    """
+    neg = abs(neg)
+
+    # if the number is out of the set of Z/nZ we first find its representation within the set
+    if neg > (n - 1):
+        neg = neg % n
+
+    # we then find the inverse of the negative number which is a positive number and from within the set Z/nZ
+    neg = n - neg
+    return neg
+
+
+def chinese_remainder_theorem(a: int, M: int, b: int, N: int) -> int:
+    """
+    This function finds the solution 'y' to two equations y = a mod M and y = b mod N using chinese remainder theorem
+    :param a: the value of the divisor of the first equation
+    :param M: the modulus value of first equation
+    :param b: the value of the divisor of the second equation
+    :param N: the modulus value of second equation
+    :return: the solution of the two equations
+    """
+    # chinese remainder theorem can only be applied if gcd of modulus of two equations is 1
+    if math.gcd(M, N) != 1:
+        return 0
+
+    return chinese_remainder_theorem_with_inverse(a, M, b, N, modular_inverse(M, N))
+
+
+def chinese_remainder_theorem_with_inverse(a: int, M: int, b: int, N: int, t: int) -> int:
+    """
+    This function finds the solution 'y' to two equations y = a mod M and y = b mod N when the inverse of M mod N has
+    already been computed, so that the same pair of moduli can be recombined many times without the Euclidean algorithm
+    :param a: the value of the divisor of the first equation
+    :param M: the modulus value of first equation
+    :param b: the value of the divisor of the second equation
+    :param N: the modulus value of second equation
+    :param t: the multiplicative inverse of M mod N
+    :return: the solution of the two equations
+    """
+    # applying chinese remainder theorem
+    u: int = ((b - a) * t) % N
+
+    return a + u * M
+
+
+def get_crt_coefficients(moduli: Sequence[int]) -> list[int]:
+    """
+    This function computes once the values Garner's algorithm needs to recombine residues w.r.t. the same moduli many
+    times, e.g. for the primes of a private key
+
+    :param moduli: the moduli, which must be pairwise mutually prime
+    :return: the list whose i-th element is the inverse of the product of the first i moduli mod the i-th modulus
+    """
+    coefficients = [1]
+    product = moduli[0]
+    for modulus in moduli[1:]:
+        coefficients.append(modular_inverse(product % modulus, modulus))
+        product *= modulus
+    return coefficients
+
+
+def chinese_remainder_theorem_multiple(residues: Sequence[int], moduli: Sequence[int],
+                                       coefficients: Sequence[int] = None) -> int:
+    """
+    This function finds the solution 'y' to the equations y = residues[i] mod moduli[i] by Garner's algorithm, which
+    adds one modulus at a time so that every multiplication and reduction is by a single modulus
+
+    :param residues: the values of the divisors of the equations
+    :param moduli: the modulus values of the equations, which must be pairwise mutually prime
+    :param coefficients: the values computed by get_crt_coefficients for these moduli; computed when not given
+    :return: the solution of the equations, an element of Z/MZ for M the product of the moduli
+    """
+    if len(residues) != len(moduli) or not moduli:
+        raise ValueError("The Chinese Remainder Theorem needs one residue for every modulus")
+    if coefficients is None:
+        coefficients = get_crt_coefficients(moduli)
+
+    y = residues[0] % moduli[0]
+    product = moduli[0]
+    for residue, modulus, coefficient in zip(residues[1:], moduli[1:], coefficients[1:]):
+        y += ((residue - y) * coefficient % modulus) * product
+        product *= modulus
+    return y
+
+
+def jacobi_symbol(a: int, n: int) -> int:
+    """
+    This function calculates the Jacobi symbol (a/n) by the binary algorithm based on quadratic reciprocity, so n never
+    has to be factored and the running time is O(log^2 n)
+
+    :param a: the value of the number for which the jacobi symbol needs to be computed
+    :param n: the value of the modulus, a positive odd number
+    :return: the jacobi symbol of a w.r.t. n, which is 0 if a and n have a common factor
+    """
+    if n <= 0 or n % 2 == 0:
+        raise ValueError("The Jacobi symbol needs a positive odd modulus")
+    return backend.current.jacobi(a, n)
+
+
+def jacobi_symbols(values: Iterable[int], n: int) -> list[int]:
+    """
+    This function calculates the Jacobi symbols of many numbers w.r.t. the same modulus, e.g. to validate a batch of
+    ciphertexts
+
+    :param values: the numbers for which the jacobi symbols need to be computed
+    :param n: the value of the modulus, a positive odd number
+    :return: the list of jacobi symbols in the order of the values
+    """
+    if n <= 0 or n % 2 == 0:
+        raise ValueError("The Jacobi symbol needs a positive odd modulus")
+    jacobi = backend.current.jacobi
+    return [jacobi(a, n) for a in values]
+
+
+def random_unit(N: int) -> int:
+    """
+    This function draws a random element of the set (Z/NZ)* i.e. an element that is mutually prime to N.
+    Random residues are drawn until one is a unit; for N = pq almost every residue is, so this costs a single gcd on
+    average and no memory
+
+    :param N: The value of N for the set (Z/NZ)* from which a random element is drawn
+    :return: a random element of (Z/NZ)*
+    """
+    if N < 2:
+        raise ValueError("The set (Z/NZ)* needs N to be at least 2")
+    while True:
+        x = random.randrange(1, N)
+
+        # if an element is mutually prime to N ; it's gcd will be 1 w.r.t N
+        if gcd(x, N) == 1:
+            return x
+
+
+def benchmark_number_theory(bits: int, rounds: int = 200) -> dict:
+    """
+    This function measures the routines of this module on random numbers of the given size
+
+    :param bits: the number of bits of the operands
+    :param rounds: the number of operations timed for every routine
+    :return: a dictionary with the average time of every routine in microseconds
+    """
+    pairs = []
+    while len(pairs) < rounds:
+        a, n = random.getrandbits(bits), random.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if math.gcd(a, n) == 1:
+            pairs.append((a, n))
+    moduli = [pairs[0][1], pairs[1][1] + 2]
+    while math.gcd(*moduli) != 1:
+        moduli[1] += 2
+
+    routines = {
+        'extended_euclidean_algorithm': lambda a, n: extended_euclidean_algorithm(n, a),
+        'modular_inverse': modular_inverse,
+        'gcd': gcd,
+        'jacobi_symbol': jacobi_symbol,
+        'chinese_remainder_theorem': lambda a, n: chinese_remainder_theorem(a, moduli[0], n, moduli[1]),
+    }
+    results = {}
+    for name, routine in routines.items():
+        start = time.perf_counter()
+        for a, n in pairs:
+            routine(a, n)
+        results[name] = (time.perf_counter() - start) / rounds * 1e6
+    return results
+
+
+if __name__ == '__main__':
+    for bits in (512, 1024, 2048, 4096):
+        timings = benchmark_number_theory(bits)
+        print(f"{bits} bits: " + ', '.join(f"{name} {value:.1f} us" for name, value in timings.items()))
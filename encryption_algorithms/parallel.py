@@ -0,0 +1,26 @@
+"""
+Helpers for running chunks of work on a multiprocessing pool while streaming.
+"""
+from collections import deque
+from typing import Callable, Iterable, Iterator
+
+
+def imap_bounded(pool: object, function: Callable, items: Iterable, window: int) -> Iterator:
+    """
+    This function applies a function to every item on a pool of worker processes and yields the results in the order
+    of the items. Unlike Pool.imap, which reads its whole input up front, it submits a new item only when a result is
+    taken, so at most window items are read ahead of the caller
+
+    :param pool: the multiprocessing pool
+    :param function: the function applied to every item
+    :param items: the items, read lazily
+    :param window: the largest number of items submitted and not yet yielded
+    :return: an iterator over the results in the order of the items
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(function, (item,)))
+        if len(pending) >= max(1, window):
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
@@ -0,0 +1,263 @@
+"""
+Prime number generation for the Setup algorithms of the RSA and Goldwasser-Micali programs.
+
+Candidates are found by an incremental sieve: a random odd starting point is chosen once, its residues modulo a table
+of small primes are kept, and a window of consecutive odd candidates is sieved by striking out the multiples of each
+small prime. Only the survivors are given to the Miller-Rabin test. Unlike Fermat's test the Miller-Rabin test is not
+fooled by Carmichael numbers, so far fewer rounds are needed for the same confidence.
+"""
+import functools
+import math
+import os
+import queue
+import random
+import time
+from itertools import compress
+
+from encryption_algorithms import backend, instrumentation
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+
+# the number of small primes whose multiples are struck out of every window of candidates
+SIEVE_PRIME_COUNT = 2048
+
+# below this bit size starting worker processes costs more than searching for the primes in one process
+PARALLEL_PRIME_BITS = 512
+
+
+@functools.lru_cache(maxsize=None)
+def get_small_primes(count: int = SIEVE_PRIME_COUNT) -> tuple[int, ...]:
+    """
+    This function generates the first count primes with the sieve of Eratosthenes
+
+    :param count: the number of primes to generate
+    :return: a tuple of the first count primes in increasing order
+    """
+    # the n-th prime is smaller than n(ln n + ln ln n) for n >= 6
+    bound = 15
+    if count >= 6:
+        bound = int(count * (math.log(count) + math.log(math.log(count)))) + 1
+
+    sieve = bytearray([1]) * (bound + 1)
+    sieve[0] = sieve[1] = 0
+    for i in range(2, math.isqrt(bound) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, bound + 1, i)))
+    return tuple(compress(range(bound + 1), sieve))[:count]
+
+
+def get_miller_rabin_rounds(bits: int) -> int:
+    """
+    This function chooses the number of Miller-Rabin rounds for a random candidate of the given bit size so that the
+    probability of accepting a composite stays below 2^-80
+
+    :param bits: the bit size of the candidate
+    :return: the number of Miller-Rabin rounds
+    """
+    # a random odd composite of many bits is very unlikely to pass even one round, so fewer rounds are needed
+    if bits >= 3747:
+        return 3
+    if bits >= 1345:
+        return 4
+    if bits >= 476:
+        return 5
+    if bits >= 400:
+        return 6
+    if bits >= 347:
+        return 7
+    if bits >= 308:
+        return 8
+    if bits >= 55:
+        return 27
+    return 34
+
+
+def generate_prime_number(limit: int) -> int:
+    """
+    This function randomly generates a prime number of the bit size specified in the param
+    and also tests its primality by an incremental sieve and the Miller-Rabin test
+
+    :param limit: the bit size to generate a random prime number of bits between limit -1 and the limit
+    :return: a prime number
+    """
+    return search_prime_number(limit)[0]
+
+
+def generate_distinct_prime_numbers(limit: int, count: int = 2, workers: int = 0) -> list[int]:
+    """
+    This function generates distinct prime numbers of the bit size specified in the param by racing independent searches
+    on a pool of worker processes and keeping the first primes found
+
+    :param limit: the bit size to generate random prime numbers of bits between limit -1 and the limit
+    :param count: the number of distinct primes to generate
+    :param workers: the number of worker processes; 0 uses one per CPU for primes of at least PARALLEL_PRIME_BITS bits
+    and searches in this process otherwise
+    :return: a list of count distinct prime numbers in the order they were found
+    """
+    if workers <= 0:
+        workers = (os.cpu_count() or 1) if limit >= PARALLEL_PRIME_BITS else 1
+
+    primes = []
+    if workers == 1:
+        while len(primes) < count:
+            with instrumentation.phase(f'primes.prime_{len(primes) + 1}'):
+                p = generate_prime_number(limit)
+            if p not in primes:
+                primes.append(p)
+        return primes
+
+    # multiprocessing is imported only when a pool is needed, which keeps importing the package cheap
+    import multiprocessing
+
+    # every worker is reseeded from the operating system so that forked workers do not repeat the same search
+    results = queue.SimpleQueue()
+    with instrumentation.phase('primes.parallel'), multiprocessing.Pool(workers, initializer=random.seed) as pool:
+        for _ in range(workers):
+            pool.apply_async(generate_prime_number, (limit,), callback=results.put, error_callback=results.put)
+
+        while len(primes) < count:
+            p = results.get()
+            if isinstance(p, BaseException):
+                raise p
+            if p not in primes:
+                primes.append(p)
+
+            # keeping every worker busy with a new search until enough primes are found
+            pool.apply_async(generate_prime_number, (limit,), callback=results.put, error_callback=results.put)
+
+    # leaving the with block terminates the workers that are still searching
+    return primes
+
+
+def search_prime_number(limit: int) -> tuple[int, int]:
+    """
+    This function walks the odd numbers upwards from a random odd starting point of the bit size specified in the param,
+    sieving them with the small primes, until the Miller-Rabin test accepts a survivor
+
+    :param limit: the bit size to generate a random prime number of bits between limit -1 and the limit
+    :return: a tuple containing the prime number and the number of candidates given to the Miller-Rabin test
+    """
+    # setting up the range of the bit size for the prime number
+    init_range = 1 << (limit - 1)
+    val_range = 1 << limit
+    rounds = get_miller_rabin_rounds(limit)
+
+    # only primes below the range can be used, otherwise a small prime candidate would strike itself out
+    sieve_primes = [p for p in get_small_primes()[1:] if p < init_range]
+    window = max(64, limit)
+    tested = 0
+
+    while True:
+
+        # randomly choosing an odd starting point between the bits specified
+        start = random.randrange(init_range, val_range) | 1
+        if instrumentation.recorder is not None:
+            instrumentation.recorder.count('candidates_drawn')
+        residues = [start % p for p in sieve_primes]
+
+        while start < val_range:
+            candidates = bytearray([1]) * window
+            for p, r in zip(sieve_primes, residues):
+                # the candidate start + 2i is divisible by p when 2i = -r mod p, i.e. i = -r * (p + 1) / 2 mod p
+                i = ((p - r) * ((p + 1) // 2)) % p
+                candidates[i::p] = bytes(len(range(i, window, p)))
+            if instrumentation.recorder is not None:
+                instrumentation.recorder.count('candidates_sieved', candidates.count(0))
+
+            # only the survivors of the sieve are given to the primality test of the arithmetic backend
+            for i in compress(range(window), candidates):
+                candidate = start + 2 * i
+                if candidate >= val_range:
+                    break
+                tested += 1
+                if backend.current.is_probable_prime(candidate, rounds):
+                    return candidate, tested
+                if instrumentation.recorder is not None:
+                    instrumentation.recorder.count('candidates_rejected')
+
+            # moving to the next window by updating the residues instead of dividing the new start again
+            start += 2 * window
+            residues = [(r + 2 * window) % p for p, r in zip(sieve_primes, residues)]
+
+
+def check_by_miller_rabin_test_method(num: int, k: int) -> int:
+    """
+    The function checks if the given number is a probable prime using the Miller-Rabin test in specified number of
+    iterations.
+
+    :param num: the number to be checked if it is a prime
+    :param k: the number of iterations to check for a number to be probable prime
+    :return: 1 if the number is not found to be composite in k iterations; otherwise returns the witness of
+    compositeness
+    """
+    if num in (2, 3):
+        return 1
+    if num < 2 or num % 2 == 0:
+        return 2
+
+    # writing num - 1 = 2^s * d with d odd
+    d = num - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for i in range(k):
+        if instrumentation.recorder is not None:
+            instrumentation.recorder.count('primality_rounds')
+
+        # the first round uses the base 2, which rejects almost every composite at the lowest cost
+        a = 2 if i == 0 else random.randint(2, num - 2)
+        x = modular_exponentiation(a, d, num)
+        if x == 1 or x == num - 1:
+            continue
+
+        # if num is a prime the sequence of squares must reach -1 before it reaches 1
+        for _ in range(s - 1):
+            x = (x * x) % num
+            if x == num - 1:
+                break
+        else:
+            return a
+    return 1
+
+
+def benchmark_prime_generation(limit: int, count: int = 20) -> dict:
+    """
+    This function measures how many candidates reach the Miller-Rabin test and how long it takes for each prime found
+
+    :param limit: the bit size of the primes
+    :param count: the number of primes to generate
+    :return: a dictionary with the average number of candidates tested and the average time in seconds per prime
+    """
+    tested = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        tested += search_prime_number(limit)[1]
+    seconds = time.perf_counter() - start
+    return {'candidates_per_prime': tested / count, 'seconds_per_prime': seconds / count}
+
+
+def benchmark_parallel_prime_generation(limit: int, workers: int, count: int = 5) -> float:
+    """
+    This function measures the average time to generate two distinct primes with the given number of worker processes
+
+    :param limit: the bit size of the primes
+    :param workers: the number of worker processes
+    :param count: the number of pairs of primes to generate
+    :return: the average time in seconds per pair of primes
+    """
+    start = time.perf_counter()
+    for _ in range(count):
+        generate_distinct_prime_numbers(limit, 2, workers)
+    return (time.perf_counter() - start) / count
+
+
+if __name__ == '__main__':
+    for nu in (256, 512, 1024, 2048, 4096):
+        result = benchmark_prime_generation(nu // 2, 20 if nu <= 2048 else 5)
+        print(f"nu = {nu}: {result['candidates_per_prime']:.1f} candidates tested per prime, "
+              f"{result['seconds_per_prime'] * 1000:.1f} ms per prime")
+
+    for workers in (1, 2, 4, os.cpu_count() or 1):
+        seconds = benchmark_parallel_prime_generation(1024, workers)
+        print(f"nu = 2048 with {workers} workers: {seconds * 1000:.1f} ms per pair of primes")
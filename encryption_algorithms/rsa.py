@@ -0,0 +1,492 @@
+"""
+RSA private key with the precomputed values needed for decryption by the Chinese Remainder Theorem.
+
+Instead of one exponentiation with the full exponent d modulo N, decryption computes c^dP mod p and c^dQ mod q, which
+are two exponentiations with half-size exponents and moduli, and recombines them into the plaintext mod N.
+
+Many ciphertexts under one key are decrypted with decrypt_batch, in chunks that can be spread over worker processes.
+Ciphertexts encrypted under keys sharing N but with distinct small public exponents (see generate_fiat_keys) can be
+decrypted together with a single full-size exponentiation by Fiat's batch RSA, fiat_batch_decrypt.
+"""
+import functools
+import os
+import random
+import time
+from dataclasses import dataclass
+from itertools import chain, islice
+from typing import Iterable, Iterator, Sequence
+
+from encryption_algorithms import instrumentation
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+from encryption_algorithms.number_theory import chinese_remainder_theorem_with_inverse, gcd, modular_inverse
+from encryption_algorithms.parallel import imap_bounded
+from encryption_algorithms.primes import generate_distinct_prime_numbers
+
+# the number of ciphertexts decrypted together, and the unit of work handed to a worker process
+CHUNK_SIZE = 64
+
+# the usual small public exponent, a prime with only two bits set so that encryption costs 17 multiplications
+DEFAULT_PUBLIC_EXPONENT = 65537
+
+
+@dataclass(frozen=True)
+class RSAPrivateKey:
+    """
+    The private key of the RSA scheme together with its Chinese Remainder Theorem precomputations
+
+    N: the public parameter N = pq
+    e: the encryption exponent
+    d: the decryption exponent
+    p: the first prime
+    q: the second prime
+    dP: the value d mod (p - 1)
+    dQ: the value d mod (q - 1)
+    qInv: the multiplicative inverse of q mod p
+    """
+    N: int
+    e: int
+    d: int
+    p: int
+    q: int
+    dP: int
+    dQ: int
+    qInv: int
+
+
+def generate_keypair(nu: int, workers: int = 0, public_exponent: int = 0) -> RSAPrivateKey:
+    """
+    This function is the Setup algorithm of the RSA scheme. It generates the two nu/2-bit primes, and the integers N, e
+    and d
+
+    With a fixed public exponent such as DEFAULT_PUBLIC_EXPONENT (65537) or 3, encryption is a short exponentiation
+    instead of one with an exponent as large as N; the primes are generated again until e is mutually prime to
+    (p - 1)(q - 1). As Naive RSA has no padding, with e = 3 any plaintext m with m^3 < N is recovered by an integer cube
+    root of its ciphertext.
+
+    :param nu: the security parameter
+    :param workers: the number of worker processes searching for the primes; 0 chooses from the size of the primes
+    :param public_exponent: the public exponent e, odd and at least 3; 0 chooses a random e of at least nu/2 bits
+    :return: the private key holding N, e, d, p, q and the Chinese Remainder Theorem precomputations
+    """
+    if public_exponent:
+        if public_exponent < 3 or public_exponent % 2 == 0:
+            raise ValueError("The public exponent must be odd and at least 3")
+        with instrumentation.phase('rsa.primes'):
+            p, q = generate_primes_for_exponent(nu, public_exponent, workers)
+        with instrumentation.phase('rsa.exponents'):
+            d = modular_inverse(public_exponent, (p - 1) * (q - 1))
+        with instrumentation.phase('rsa.crt'):
+            return generate_private_key(p, q, public_exponent, d)
+
+    with instrumentation.phase('rsa.primes'):
+        p, q = generate_distinct_prime_numbers(nu // 2, 2, workers)
+    M = (p - 1) * (q - 1)
+
+    with instrumentation.phase('rsa.exponents'):
+        # generating a random integer e such that gcd(e;M) = 1:
+        while True:
+            e = random.randint(1 << ((nu // 2) - 1), M)
+
+            # checking if gcd (e,M) == 1
+            if gcd(e, M) == 1:
+                break
+
+        # the decryption exponent d is the multiplicative inverse of e within Z/MZ
+        d = modular_inverse(e, M)
+
+    with instrumentation.phase('rsa.crt'):
+        return generate_private_key(p, q, e, d)
+
+
+def generate_primes_for_exponent(nu: int, e: int, workers: int = 0) -> tuple[int, int]:
+    """
+    This function generates the two nu/2-bit primes again until a given public exponent is mutually prime to
+    (p - 1)(q - 1), so that it has an inverse d
+
+    :param nu: the security parameter
+    :param e: the public exponent, or the product of several public exponents
+    :param workers: the number of worker processes searching for the primes; 0 chooses from the size of the primes
+    :return: the primes p and q
+    """
+    while True:
+        p, q = generate_distinct_prime_numbers(nu // 2, 2, workers)
+        if gcd(e, (p - 1) * (q - 1)) == 1:
+            return p, q
+
+
+def generate_private_key(p: int, q: int, e: int, d: int) -> RSAPrivateKey:
+    """
+    This function computes the Chinese Remainder Theorem values of a private key once, at setup
+
+    :param p: the first prime generated by the Setup algorithm
+    :param q: the second prime generated by the Setup algorithm
+    :param e: the encryption exponent
+    :param d: the decryption exponent
+    :return: the private key holding p, q, dP, dQ and qInv
+    """
+    if gcd(p, q) != 1:
+        raise ValueError("The primes p and q must be distinct")
+    inverse = modular_inverse(q, p)
+
+    return RSAPrivateKey(N=p * q, e=e, d=d, p=p, q=q, dP=d % (p - 1), dQ=d % (q - 1), qInv=inverse)
+
+
+def decrypt(c: int, private_key: RSAPrivateKey) -> int:
+    """
+    The function decrypts a cipher text to plain text using RSA scheme and the Chinese Remainder Theorem.
+
+    :param c: the ciphertext to be decrypted
+    :param private_key: the private key with its Chinese Remainder Theorem precomputations
+    :return: the plain text for the given cipher text
+    """
+    # two half-size exponentiations: m = c^d mod p and m = c^d mod q
+    mp = modular_exponentiation(c % private_key.p, private_key.dP, private_key.p)
+    mq = modular_exponentiation(c % private_key.q, private_key.dQ, private_key.q)
+
+    # recombining the two residues into the plaintext mod N = pq
+    return chinese_remainder_theorem_with_inverse(mq, private_key.q, mp, private_key.p, private_key.qInv)
+
+
+def decrypt_chunk(ciphertexts: Sequence[int], private_key: RSAPrivateKey) -> list[int]:
+    """
+    The function decrypts a chunk of ciphertexts under one key, the unit of work of a worker process. Every ciphertext
+    costs the same as decrypt: the exponentiations of distinct ciphertexts share no precomputation
+
+    :param ciphertexts: the ciphertexts to be decrypted
+    :param private_key: the private key with its Chinese Remainder Theorem precomputations
+    :return: the plain texts in the order of the ciphertexts
+    """
+    p, q, dP, dQ, qInv = private_key.p, private_key.q, private_key.dP, private_key.dQ, private_key.qInv
+    exponentiation = modular_exponentiation
+    plaintexts = []
+    for c in ciphertexts:
+        mq = exponentiation(c % q, dQ, q)
+        plaintexts.append(mq + ((exponentiation(c % p, dP, p) - mq) * qInv % p) * q)
+    return plaintexts
+
+
+def decrypt_chunks(ciphertexts: Iterable[int], private_key: RSAPrivateKey, workers: int = 0,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[list[int]]:
+    """
+    This function splits the ciphertexts into chunks and decrypts them, in this process or on a pool of worker
+    processes; the chunks are returned in the order of the ciphertexts either way. The worker processes are where the
+    time is saved, so ciphertexts filling more than one chunk are spread over one worker per CPU by default
+
+    :param ciphertexts: the ciphertexts to be decrypted
+    :param private_key: the private key with its Chinese Remainder Theorem precomputations
+    :param workers: the number of worker processes decrypting chunks; 0 uses one per CPU
+    :param chunk_size: the number of ciphertexts in one chunk
+    :return: an iterator over the decrypted chunks
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    iterator = iter(ciphertexts)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+
+    # a single chunk is decrypted in this process, which is faster than starting a pool for it
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    chunks = chain([first], [] if second is None else [second], chunks)
+
+    if workers == 1 or second is None:
+        for chunk in chunks:
+            yield decrypt_chunk(chunk, private_key)
+    else:
+        import multiprocessing
+
+        # at most two chunks per worker are read ahead, so a stream of ciphertexts is never held in memory at once
+        with multiprocessing.Pool(workers) as pool:
+            yield from imap_bounded(pool, functools.partial(decrypt_chunk, private_key=private_key), chunks,
+                                    2 * workers)
+
+
+def decrypt_batch(ciphertexts: Iterable[int], private_key: RSAPrivateKey, workers: int = 0,
+                  chunk_size: int = CHUNK_SIZE) -> list[int]:
+    """
+    The function decrypts many ciphertexts under one key using RSA scheme and the Chinese Remainder Theorem, on one
+    worker process per CPU by default; in a single process it costs the same per ciphertext as decrypt
+
+    :param ciphertexts: the ciphertexts to be decrypted
+    :param private_key: the private key with its Chinese Remainder Theorem precomputations
+    :param workers: the number of worker processes decrypting chunks; 0 uses one per CPU
+    :param chunk_size: the number of ciphertexts in one chunk
+    :return: the plain texts in the order of the ciphertexts
+    """
+    plaintexts = []
+    for chunk in decrypt_chunks(ciphertexts, private_key, workers, chunk_size):
+        plaintexts.extend(chunk)
+    return plaintexts
+
+
+def generate_fiat_keys(nu: int, exponents: Sequence[int], workers: int = 0) -> list[RSAPrivateKey]:
+    """
+    This function is the Setup algorithm for Fiat's batch RSA. It generates one modulus N and a key for every public
+    exponent; the primes are generated again until every exponent is mutually prime to (p - 1)(q - 1)
+
+    :param nu: the security parameter
+    :param exponents: the public exponents, small, greater than 1 and pairwise mutually prime, e.g. 3, 5, 7 and 11
+    :param workers: the number of worker processes searching for the primes; 0 chooses from the size of the primes
+    :return: the private keys in the order of the exponents, all with the same N
+    """
+    product = 1
+    for e in exponents:
+        if e < 2 or gcd(e, product) != 1:
+            raise ValueError("The public exponents must be greater than 1 and pairwise mutually prime")
+        product *= e
+
+    p, q = generate_primes_for_exponent(nu, product, workers)
+    M = (p - 1) * (q - 1)
+    return [generate_private_key(p, q, e, modular_inverse(e, M)) for e in exponents]
+
+
+def percolate_up(ciphertexts: Sequence[int], exponents: Sequence[int], N: int) -> tuple:
+    """
+    This function builds the product tree of Fiat's batch RSA. The node of the ciphertexts c_i under the exponents e_i
+    holds v = prod(c_i^(E/e_i)) mod N for E = prod(e_i), so that v^(1/E) = prod(c_i^(1/e_i))
+
+    :param ciphertexts: the ciphertexts of the node
+    :param exponents: the public exponents of the ciphertexts
+    :param N: the public parameter N shared by the keys
+    :return: the node as a tuple (v, E, left child, right child); the children of a leaf are None
+    """
+    if len(ciphertexts) == 1:
+        return ciphertexts[0] % N, exponents[0], None, None
+
+    middle = len(ciphertexts) // 2
+    left = percolate_up(ciphertexts[:middle], exponents[:middle], N)
+    right = percolate_up(ciphertexts[middle:], exponents[middle:], N)
+    v = (modular_exponentiation(left[0], right[1], N) * modular_exponentiation(right[0], left[1], N)) % N
+    return v, left[1] * right[1], left, right
+
+
+def percolate_down(node: tuple, root: int, N: int, plaintexts: list[int]) -> None:
+    """
+    This function splits the E-th root of the value of a node into the roots of its leaves, i.e. the plaintexts.
+    For X = 0 mod E_L and X = 1 mod E_R, the root of the right child is root^X / (v_L^(X/E_L) . v_R^((X-1)/E_R)), and
+    the root of the left child is what remains of the root
+
+    :param node: the node built by percolate_up
+    :param root: the value v^(1/E) of the node
+    :param N: the public parameter N shared by the keys
+    :param plaintexts: the list to which the plaintexts of the leaves are appended
+    :return: None
+    """
+    v, E, left, right = node
+    if left is None:
+        plaintexts.append(root)
+        return
+
+    left_exponent, right_exponent = left[1], right[1]
+    X = left_exponent * modular_inverse(left_exponent, right_exponent)
+    divisor = (modular_exponentiation(left[0], X // left_exponent, N) *
+               modular_exponentiation(right[0], (X - 1) // right_exponent, N)) % N
+    right_root = (modular_exponentiation(root, X, N) * modular_inverse(divisor, N)) % N
+    left_root = (root * modular_inverse(right_root, N)) % N
+
+    percolate_down(left, left_root, N, plaintexts)
+    percolate_down(right, right_root, N, plaintexts)
+
+
+def fiat_batch_decrypt(ciphertexts: Sequence[int], private_keys: Sequence[RSAPrivateKey]) -> list[int]:
+    """
+    The function decrypts ciphertexts encrypted under keys with the same N and distinct, pairwise mutually prime public
+    exponents by Fiat's batch RSA: the ciphertexts are combined into one value, a single exponentiation with a full-size
+    exponent (by the Chinese Remainder Theorem) takes its root, and the root is split again into the plaintexts using
+    exponentiations with small exponents only
+
+    :param ciphertexts: the ciphertexts to be decrypted
+    :param private_keys: the key under which each ciphertext was encrypted, e.g. from generate_fiat_keys
+    :return: the plain texts in the order of the ciphertexts
+    """
+    if len(ciphertexts) != len(private_keys) or not ciphertexts:
+        raise ValueError("Fiat's batch RSA needs one key for every ciphertext")
+    private_key = private_keys[0]
+    if any(key.N != private_key.N for key in private_keys):
+        raise ValueError("Fiat's batch RSA needs keys sharing the modulus N")
+    if len(ciphertexts) == 1:
+        return [decrypt(ciphertexts[0], private_key)]
+
+    N = private_key.N
+    tree = percolate_up(ciphertexts, [key.e for key in private_keys], N)
+    v, E = tree[0], tree[1]
+
+    # a ciphertext sharing a factor with N has no root to split, so such a batch is decrypted one by one
+    if gcd(v, N) != 1:
+        return [decrypt(c, key) for c, key in zip(ciphertexts, private_keys)]
+
+    # the E-th root of v, i.e. v^(1/E mod (p-1)(q-1)), through the Chinese Remainder Theorem
+    p, q = private_key.p, private_key.q
+    root_p = modular_exponentiation(v % p, modular_inverse(E, p - 1), p)
+    root_q = modular_exponentiation(v % q, modular_inverse(E, q - 1), q)
+    root = chinese_remainder_theorem_with_inverse(root_q, q, root_p, p, private_key.qInv)
+
+    plaintexts = []
+    percolate_down(tree, root, N, plaintexts)
+    return plaintexts
+
+
+class RSA:
+    """
+    The Naive RSA scheme with one key. The key is generated only when asked for, with RSA.generate(nu)
+
+        scheme = RSA.generate(1024)
+        assert scheme.decrypt(scheme.encrypt(42)) == 42
+    """
+
+    def __init__(self, private_key: RSAPrivateKey):
+        """
+        :param private_key: the key used for encryption and decryption
+        """
+        self.private_key = private_key
+
+    @classmethod
+    def generate(cls, nu: int, workers: int = 0, public_exponent: int = 0) -> 'RSA':
+        """
+        This function runs the Setup algorithm and returns the scheme with the new key
+
+        :param nu: the security parameter
+        :param workers: the number of worker processes searching for the primes; 0 chooses from the size of the primes
+        :param public_exponent: the public exponent e, e.g. 65537; 0 chooses a random e of at least nu/2 bits
+        :return: the scheme holding the new key
+        """
+        return cls(generate_keypair(nu, workers, public_exponent))
+
+    @property
+    def N(self) -> int:
+        """
+        :return: the public parameter N = pq
+        """
+        return self.private_key.N
+
+    @property
+    def e(self) -> int:
+        """
+        :return: the public key, the encryption exponent e
+        """
+        return self.private_key.e
+
+    def encrypt(self, m: int) -> int:
+        """
+        The function encrypts a given plaintext message m to a ciphertext using RSA scheme
+
+        :param m: the plain text message which needs to be encrypted, an element of Z/NZ
+        :return: the ciphertext obtained by encrypting the plaintext m
+        """
+        return modular_exponentiation(m, self.private_key.e, self.private_key.N)
+
+    def decrypt(self, c: int) -> int:
+        """
+        The function decrypts a cipher text to plain text using RSA scheme and the Chinese Remainder Theorem
+
+        :param c: the ciphertext to be decrypted, an element of Z/NZ
+        :return: the plain text for the given cipher text
+        """
+        return decrypt(c, self.private_key)
+
+    def decrypt_batch(self, ciphertexts: Iterable[int], workers: int = 0) -> list[int]:
+        """
+        The function decrypts many cipher texts using RSA scheme and the Chinese Remainder Theorem
+
+        :param ciphertexts: the ciphertexts to be decrypted, elements of Z/NZ
+        :param workers: the number of worker processes; 0 uses one per CPU
+        :return: the plain texts in the order of the ciphertexts
+        """
+        return decrypt_batch(ciphertexts, self.private_key, workers)
+
+
+def benchmark_crt_decryption(private_key: RSAPrivateKey, rounds: int = 200) -> dict:
+    """
+    This function measures the average time of one decryption with the full exponent d mod N and with the Chinese
+    Remainder Theorem
+
+    :param private_key: the private key used for both decryptions
+    :param rounds: the number of decryptions timed for each method
+    :return: a dictionary with the average times in seconds and the speedup of the Chinese Remainder Theorem
+    """
+    ciphertexts = [random.randrange(private_key.N) for _ in range(rounds)]
+
+    start = time.perf_counter()
+    expected = [modular_exponentiation(c, private_key.d, private_key.N) for c in ciphertexts]
+    standard = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    results = [decrypt(c, private_key) for c in ciphertexts]
+    crt = (time.perf_counter() - start) / rounds
+
+    if results != expected:
+        raise AssertionError("The Chinese Remainder Theorem decryption disagrees with c^d mod N")
+    return {'standard': standard, 'crt': crt, 'speedup': standard / crt}
+
+
+def benchmark_batch_decryption(private_key: RSAPrivateKey, size: int = 256, workers: int = 0) -> dict:
+    """
+    This function measures the average time per ciphertext of decrypt called once for every ciphertext and of
+    decrypt_batch
+
+    :param private_key: the private key used for both decryptions
+    :param size: the number of ciphertexts
+    :param workers: the number of worker processes used by decrypt_batch; 0 uses one per CPU
+    :return: a dictionary with the average times in seconds and the speedup of decrypt_batch
+    """
+    plaintexts = [random.randrange(private_key.N) for _ in range(size)]
+    ciphertexts = [modular_exponentiation(m, private_key.e, private_key.N) for m in plaintexts]
+
+    start = time.perf_counter()
+    results = [decrypt(c, private_key) for c in ciphertexts]
+    single = (time.perf_counter() - start) / size
+    if results != plaintexts:
+        raise AssertionError("The decryption disagrees with the plaintexts")
+
+    start = time.perf_counter()
+    results = decrypt_batch(ciphertexts, private_key, workers)
+    batch = (time.perf_counter() - start) / size
+    if results != plaintexts:
+        raise AssertionError("The batch decryption disagrees with the plaintexts")
+    return {'single': single, 'batch': batch, 'speedup': single / batch}
+
+
+def benchmark_fiat_decryption(private_keys: Sequence[RSAPrivateKey], rounds: int = 5) -> dict:
+    """
+    This function measures the average time per ciphertext of decrypting one ciphertext under each key one by one and
+    of fiat_batch_decrypt
+
+    :param private_keys: keys sharing N with distinct public exponents, e.g. from generate_fiat_keys
+    :param rounds: the number of batches timed
+    :return: a dictionary with the average times in seconds and the speedup of fiat_batch_decrypt
+    """
+    N = private_keys[0].N
+    batches = []
+    for _ in range(rounds):
+        plaintexts = [random.randrange(N) for _ in private_keys]
+        ciphertexts = [modular_exponentiation(m, key.e, N) for m, key in zip(plaintexts, private_keys)]
+        batches.append((plaintexts, ciphertexts))
+
+    single = fiat = 0.0
+    for plaintexts, ciphertexts in batches:
+        start = time.perf_counter()
+        results = [decrypt(c, key) for c, key in zip(ciphertexts, private_keys)]
+        single += time.perf_counter() - start
+        if results != plaintexts:
+            raise AssertionError("The decryption disagrees with the plaintexts")
+
+        start = time.perf_counter()
+        results = fiat_batch_decrypt(ciphertexts, private_keys)
+        fiat += time.perf_counter() - start
+        if results != plaintexts:
+            raise AssertionError("Fiat's batch decryption disagrees with the plaintexts")
+
+    count = rounds * len(private_keys)
+    return {'single': single / count, 'fiat': fiat / count, 'speedup': single / fiat}
+
+
+if __name__ == '__main__':
+    for nu in (1024, 2048, 4096):
+        result = benchmark_batch_decryption(generate_keypair(nu), 64 if nu < 4096 else 16)
+        print(f"nu = {nu}: decrypt {result['single'] * 1000:.3f} ms, decrypt_batch {result['batch'] * 1000:.3f} ms "
+              f"per ciphertext (x{result['speedup']:.2f})")
+        for exponents in ((3, 5), (3, 5, 7, 11), (3, 5, 7, 11, 13, 17, 19, 23)):
+            result = benchmark_fiat_decryption(generate_fiat_keys(nu, exponents, workers=1))
+            print(f"    batch of {len(exponents)}: decrypt {result['single'] * 1000:.3f} ms, fiat_batch_decrypt "
+                  f"{result['fiat'] * 1000:.3f} ms per ciphertext (x{result['speedup']:.2f})")
@@ -0,0 +1,311 @@
+"""
+Streaming RSA encryption and decryption of files and other binary streams.
+
+The plaintext is read in buffered (or memory-mapped) chunks and split into blocks of block_size(N) bytes, so that every
+block read as a big-endian integer is smaller than N. The last block is padded with a 0x80 byte followed by zero bytes
+(a full block of padding is added when the plaintext ends on a block boundary) so that decryption can find the end of the
+plaintext without knowing its length in advance.
+
+The ciphertext is a header (the magic bytes RSAS and the ciphertext width as a 4-byte big-endian integer) followed by
+every ciphertext block as a big-endian integer of exactly that width. Every stage is a generator, so the memory used
+stays constant whatever the size of the stream. From the command line, a file or stdin is encrypted to a file or
+stdout with a key of a keystore:
+
+    python -m encryption_algorithms.rsa_stream encrypt --keystore keys.bin --key alice < message.bin > message.rsas
+    python -m encryption_algorithms.rsa_stream decrypt --keystore keys.bin --key alice message.rsas message.bin
+"""
+import io
+import mmap
+import os
+import random
+import sys
+import time
+from typing import BinaryIO, Iterable, Iterator, Union
+
+from encryption_algorithms import rsa
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+
+MAGIC = b'RSAS'
+
+# the number of bytes read from the source at a time
+READ_SIZE = 1 << 16
+
+
+def block_size(N: int) -> int:
+    """
+    This function calculates the number of plaintext bytes in one block
+
+    :param N: the public parameter N
+    :return: the largest number of bytes whose value is always smaller than N
+    """
+    size = (N.bit_length() - 1) // 8
+    if size < 1:
+        raise ValueError("The public parameter N is too small to encrypt a single byte")
+    return size
+
+
+def ciphertext_width(N: int) -> int:
+    """
+    This function calculates the number of bytes of one ciphertext block
+
+    :param N: the public parameter N
+    :return: the number of bytes needed for any element of Z/NZ
+    """
+    return (N.bit_length() + 7) // 8
+
+
+def read_chunks(source: Union[BinaryIO, mmap.mmap], size: int = READ_SIZE) -> Iterator[bytes]:
+    """
+    This function reads a binary stream or a memory map chunk by chunk
+
+    :param source: the stream or memory map to be read
+    :param size: the number of bytes in one chunk
+    :return: an iterator over the chunks
+    """
+    while True:
+        chunk = source.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def split_blocks(chunks: Iterable[bytes], size: int) -> Iterator[bytes]:
+    """
+    This function splits chunks of plaintext into blocks of the given size and pads the last block
+
+    :param chunks: the chunks of plaintext
+    :param size: the number of bytes in one block
+    :return: an iterator over the blocks, all of exactly the given size
+    """
+    pending = b''
+    for chunk in chunks:
+        pending += chunk
+        whole = len(pending) - len(pending) % size
+        for i in range(0, whole, size):
+            yield pending[i:i + size]
+        pending = pending[whole:]
+
+    # the padding is a 0x80 byte followed by zero bytes up to the end of the block
+    yield pending + b'\x80' + bytes(size - len(pending) - 1)
+
+
+def encrypt_blocks(blocks: Iterable[bytes], e: int, N: int) -> Iterator[bytes]:
+    """
+    This function encrypts plaintext blocks to fixed-width ciphertext blocks using RSA scheme
+
+    :param blocks: the plaintext blocks, each smaller than N when read as a big-endian integer
+    :param e: the public key
+    :param N: the public parameter N
+    :return: an iterator over the ciphertext blocks
+    """
+    width = ciphertext_width(N)
+    for block in blocks:
+        m = int.from_bytes(block, 'big')
+        yield modular_exponentiation(m, e, N).to_bytes(width, 'big')
+
+
+def decrypt_blocks(blocks: Iterable[bytes], private_key: rsa.RSAPrivateKey) -> Iterator[bytes]:
+    """
+    This function decrypts fixed-width ciphertext blocks to plaintext blocks using RSA scheme and removes the padding
+    from the last block
+
+    :param blocks: the ciphertext blocks
+    :param private_key: the private key with its Chinese Remainder Theorem precomputations
+    :return: an iterator over the plaintext blocks
+    """
+    size = block_size(private_key.N)
+    previous = None
+    for block in blocks:
+        if previous is not None:
+            yield previous
+        c = int.from_bytes(block, 'big')
+        if c >= private_key.N:
+            raise ValueError("A ciphertext block is not an element of Z/NZ")
+        m = rsa.decrypt(c, private_key)
+        # every plaintext block is shorter than N, so a larger value comes from another key of the same width or from a
+        # corrupted block
+        if m >> (8 * size):
+            raise ValueError("The ciphertext stream was not encrypted for this key")
+        previous = m.to_bytes(size, 'big')
+
+    # only the last block carries the padding
+    if previous is None:
+        raise ValueError("The ciphertext stream holds no blocks")
+    plaintext = previous.rstrip(b'\x00')
+    if not plaintext.endswith(b'\x80'):
+        raise ValueError("The last ciphertext block is not correctly padded")
+    yield plaintext[:-1]
+
+
+def read_frames(source: BinaryIO, width: int) -> Iterator[bytes]:
+    """
+    This function reads fixed-width ciphertext blocks from a buffered stream
+
+    :param source: the stream holding the ciphertext blocks after the header
+    :param width: the number of bytes of one ciphertext block
+    :return: an iterator over the ciphertext blocks
+    """
+    count = max(1, READ_SIZE // width)
+    for chunk in read_chunks(source, count * width):
+        if len(chunk) % width != 0:
+            raise ValueError("The ciphertext stream is truncated")
+        for i in range(0, len(chunk), width):
+            yield chunk[i:i + width]
+
+
+def encrypt_stream(source: BinaryIO, destination: BinaryIO, e: int, N: int) -> None:
+    """
+    The function encrypts a binary stream to a framed ciphertext stream using RSA scheme
+
+    :param source: the stream holding the plaintext
+    :param destination: the stream to which the header and the ciphertext blocks are written
+    :param e: the public key
+    :param N: the public parameter N
+    :return: None
+    """
+    width = ciphertext_width(N)
+    destination.write(MAGIC + width.to_bytes(4, 'big'))
+    for block in encrypt_blocks(split_blocks(read_chunks(source), block_size(N)), e, N):
+        destination.write(block)
+
+
+def decrypt_stream(source: BinaryIO, destination: BinaryIO, private_key: rsa.RSAPrivateKey) -> None:
+    """
+    The function decrypts a framed ciphertext stream written by encrypt_stream using RSA scheme
+
+    :param source: the stream holding the header and the ciphertext blocks
+    :param destination: the stream to which the plaintext is written
+    :param private_key: the private key with its Chinese Remainder Theorem precomputations
+    :return: None
+    """
+    header = source.read(len(MAGIC) + 4)
+    if len(header) != len(MAGIC) + 4 or header[:len(MAGIC)] != MAGIC:
+        raise ValueError("The stream is not an RSA ciphertext stream")
+    width = int.from_bytes(header[len(MAGIC):], 'big')
+    if width != ciphertext_width(private_key.N):
+        raise ValueError("The ciphertext stream was not encrypted for this key")
+
+    for block in decrypt_blocks(read_frames(source, width), private_key):
+        destination.write(block)
+
+
+def encrypt_file(source_path: str, destination_path: str, e: int, N: int) -> None:
+    """
+    The function encrypts a file using RSA scheme; a non-empty file is read through a memory map
+
+    :param source_path: the path of the plaintext file
+    :param destination_path: the path of the ciphertext file to be written
+    :param e: the public key
+    :param N: the public parameter N
+    :return: None
+    """
+    with open(source_path, 'rb') as source, open(destination_path, 'wb') as destination:
+        if os.fstat(source.fileno()).st_size == 0:
+            encrypt_stream(source, destination, e, N)
+            return
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            encrypt_stream(mapped, destination, e, N)
+
+
+def decrypt_file(source_path: str, destination_path: str, private_key: rsa.RSAPrivateKey) -> None:
+    """
+    The function decrypts a file written by encrypt_file using RSA scheme
+
+    :param source_path: the path of the ciphertext file
+    :param destination_path: the path of the plaintext file to be written
+    :param private_key: the private key with its Chinese Remainder Theorem precomputations
+    :return: None
+    """
+    with open(source_path, 'rb') as source, open(destination_path, 'wb') as destination:
+        decrypt_stream(source, destination, private_key)
+
+
+def benchmark_stream(private_key: rsa.RSAPrivateKey, size: int = 1 << 16) -> dict:
+    """
+    This function measures the throughput of encrypt_stream and decrypt_stream
+
+    :param private_key: the key used for encryption and decryption
+    :param size: the number of random plaintext bytes
+    :return: a dictionary with the encryption and decryption throughput in megabytes per second
+    """
+    data = random.randbytes(size)
+    ciphertext = io.BytesIO()
+    plaintext = io.BytesIO()
+
+    start = time.perf_counter()
+    encrypt_stream(io.BytesIO(data), ciphertext, private_key.e, private_key.N)
+    encryption = time.perf_counter() - start
+
+    ciphertext.seek(0)
+    start = time.perf_counter()
+    decrypt_stream(ciphertext, plaintext, private_key)
+    decryption = time.perf_counter() - start
+
+    if plaintext.getvalue() != data:
+        raise AssertionError("The decrypted stream differs from the plaintext")
+    return {'encrypt': size / encryption / 1e6, 'decrypt': size / decryption / 1e6}
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    This function is the entry point of the streaming mode: it encrypts or decrypts a file or stdin to a file or
+    stdout. The private key is read from a keystore; encryption can also be given the public key (N, e) alone
+
+    :param argv: the command line arguments without the program name
+    :return: the exit status, 1 if the stream could not be encrypted or decrypted
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Encrypt or decrypt a binary stream with RSA.")
+    parser.add_argument('command', choices=('encrypt', 'decrypt'))
+    parser.add_argument('input', nargs='?', default='-', help="the file to be read; - reads stdin")
+    parser.add_argument('output', nargs='?', default='-', help="the file to be written; - writes stdout")
+    parser.add_argument('--keystore', help="the keystore file holding the key")
+    parser.add_argument('--key', help="the id of the key in the keystore")
+    parser.add_argument('--N', type=int, help="the public parameter N, for encryption without a keystore")
+    parser.add_argument('--e', type=int, help="the public key e, for encryption without a keystore")
+    # the paths may follow the key options, which parse_args would not allow for optional positionals
+    args = parser.parse_intermixed_args(argv)
+
+    if args.keystore and args.key:
+        # the keystore is imported only when a key is read from it
+        from encryption_algorithms.keystore import KeyStore
+
+        with KeyStore(args.keystore) as store:
+            if args.key not in store:
+                parser.error(f"No key with id {args.key!r} in {args.keystore}")
+            private_key = store.get(args.key)
+        if not isinstance(private_key, rsa.RSAPrivateKey):
+            parser.error(f"The key {args.key!r} is not an RSA key")
+        N, e = private_key.N, private_key.e
+    elif args.command == 'encrypt' and args.N and args.e:
+        private_key, N, e = None, args.N, args.e
+    else:
+        parser.error("give --keystore and --key, or --N and --e to encrypt")
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    destination = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        if args.command == 'encrypt':
+            encrypt_stream(source, destination, e, N)
+        else:
+            decrypt_stream(source, destination, private_key)
+    except ValueError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if destination is not sys.stdout.buffer:
+            destination.close()
+        else:
+            destination.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    for nu in (512, 1024, 2048, 4096):
+        result = benchmark_stream(rsa.generate_keypair(nu), 1 << 15)
+        print(f"nu = {nu}: encryption {result['encrypt']:.3f} MB/s, decryption {result['decrypt']:.3f} MB/s")
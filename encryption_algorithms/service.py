@@ -0,0 +1,499 @@
+"""
+Asyncio service performing the operations of the batch mode for many clients over a local TCP or Unix socket.
+
+Every request and response is a frame: a 4-byte big-endian length followed by a JSON object in UTF-8. A request is an
+operation record of the batch mode together with the scheme it belongs to, e.g.
+
+    {"id": 1, "scheme": "rsa", "op": "keygen", "nu": 1024, "key": "alice"}
+    {"id": 2, "scheme": "rsa", "op": "decrypt", "key": "alice", "c": 123456789}
+
+and its response is the result of the batch mode, carrying the same id. A client may send many requests without waiting
+for their responses; responses can arrive out of order and are matched by id. Keys generated by keygen stay in the
+memory of the server for every client; a key can be used once the response to its keygen has arrived.
+
+Requests waiting in the queue are grouped into micro-batches of up to batch_size requests (waiting batch_window seconds
+for a batch to fill) and every batch runs on a pool of worker processes, so the event loop never performs an
+exponentiation. The request {"op": "metrics"} returns the request latencies, the queue depth and the batch sizes, as
+JSON or, with "format": "prometheus", as Prometheus text.
+
+    python -m encryption_algorithms.service serve --port 8765
+    python -m encryption_algorithms.service load --port 8765 --scheme rsa --nu 1024 --clients 8 --requests 2000
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from encryption_algorithms import batch
+
+_LENGTH = struct.Struct('>I')
+
+# the largest frame accepted, in bytes
+MAX_FRAME_SIZE = 1 << 24
+
+# the largest number of requests in one micro-batch, and the number of seconds waited for a batch to fill
+BATCH_SIZE = 64
+BATCH_WINDOW = 0.002
+
+# the number of latencies kept for the percentiles reported by the metrics
+LATENCY_WINDOW = 10000
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[dict]:
+    """
+    This function reads one length-prefixed JSON frame
+
+    :param reader: the stream of the connection
+    :return: the decoded message, or None when the connection was closed between frames
+    """
+    try:
+        header = await reader.readexactly(_LENGTH.size)
+    except asyncio.IncompleteReadError as error:
+        if error.partial:
+            raise
+        return None
+    length, = _LENGTH.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"A frame of {length} bytes is larger than {MAX_FRAME_SIZE} bytes")
+    return json.loads(await reader.readexactly(length))
+
+
+def write_frame(writer: asyncio.StreamWriter, message: dict) -> None:
+    """
+    The function writes one length-prefixed JSON frame; the frame is written in a single call so that frames written by
+    concurrent tasks never interleave
+
+    :param writer: the stream of the connection
+    :param message: the message to be encoded
+    :return: None
+    """
+    payload = json.dumps(message).encode('utf-8')
+    writer.write(_LENGTH.pack(len(payload)) + payload)
+
+
+def process_batch(scheme: str, records: list[dict], keys: dict) -> tuple[list[dict], dict]:
+    """
+    This function performs a micro-batch of operations of one scheme in a worker process
+
+    :param scheme: the name of the scheme, a key of batch.HANDLERS
+    :param records: the operation records
+    :param keys: the keys named by the records, by name
+    :return: a tuple containing the results in the order of the records and the keys after the batch, including the
+    keys generated by it
+    """
+    handler = batch.HANDLERS[scheme]
+    return [batch.process_record(handler, record, keys) for record in records], keys
+
+
+class ServiceMetrics:
+    """
+    The request latencies, the queue depth and the sizes of the micro-batches of a running service
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def to_dict(self) -> dict:
+        """
+        This function exports the metrics
+
+        :return: a dictionary with the counts, the queue depth, the average batch size and the median and 99th
+        percentile latency in seconds of the recent requests
+        """
+        latencies = sorted(self.latencies)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'average_batch_size': self.batched_requests / self.batches if self.batches else 0.0,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'latency_median': statistics.median(latencies) if latencies else 0.0,
+            'latency_p99': latencies[max(0, -(-99 * len(latencies) // 100) - 1)] if latencies else 0.0,
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        This function exports the metrics in the Prometheus text exposition format
+
+        :return: the metrics, one per line
+        """
+        data = self.to_dict()
+        lines = []
+        for name in ('requests', 'errors', 'batches'):
+            lines.append(f'# TYPE encryption_service_{name}_total counter')
+            lines.append(f'encryption_service_{name}_total {data[name]}')
+        for name in ('average_batch_size', 'queue_depth', 'max_queue_depth'):
+            lines.append(f'# TYPE encryption_service_{name} gauge')
+            lines.append(f'encryption_service_{name} {data[name]}')
+        lines.append('# TYPE encryption_service_latency_seconds summary')
+        lines.append(f'encryption_service_latency_seconds{{quantile="0.5"}} {data["latency_median"]}')
+        lines.append(f'encryption_service_latency_seconds{{quantile="0.99"}} {data["latency_p99"]}')
+        return '\n'.join(lines) + '\n'
+
+
+class EncryptionService:
+    """
+    The server holding the keys in memory, queueing the requests of every connection and running them in micro-batches
+    on a pool of worker processes
+    """
+
+    def __init__(self, workers: int = 0, batch_size: int = BATCH_SIZE, batch_window: float = BATCH_WINDOW):
+        """
+        :param workers: the number of worker processes; 0 uses one per CPU
+        :param batch_size: the largest number of requests in one micro-batch
+        :param batch_window: the number of seconds waited for a micro-batch to fill
+        """
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.metrics = ServiceMetrics()
+        self.keys: dict[str, dict] = {scheme: {} for scheme in batch.HANDLERS}
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._batcher: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """
+        This function starts the worker processes and the task forming the micro-batches
+
+        :return: None
+        """
+        self._queue = asyncio.Queue()
+        # at most two batches per worker are in flight, so the queue depth shows the real backlog
+        self._slots = asyncio.Semaphore(2 * self.workers)
+        self._executor = ProcessPoolExecutor(self.workers)
+        self._batcher = asyncio.create_task(self._form_batches())
+
+    async def close(self) -> None:
+        """
+        This function stops the task forming the micro-batches and the worker processes
+
+        :return: None
+        """
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def submit(self, request: dict) -> dict:
+        """
+        This function performs one request
+
+        :param request: the operation record together with its scheme
+        :return: the response
+        """
+        start = time.perf_counter()
+        self.metrics.requests += 1
+        if request.get('op') == 'metrics':
+            if request.get('format') == 'prometheus':
+                response = {'metrics': self.metrics.to_prometheus()}
+            else:
+                response = {'metrics': self.metrics.to_dict()}
+        elif request.get('scheme') not in batch.HANDLERS:
+            response = {'error': f"ValueError: Unknown scheme {request.get('scheme')!r}"}
+        elif not isinstance(request.get('key', 'default'), str):
+            # the key names the stored key, so it is checked before the request can reach a micro-batch
+            response = {'error': f"ValueError: The key must be a string, not {request.get('key')!r}"}
+        else:
+            future = asyncio.get_running_loop().create_future()
+            await self._queue.put((request, future))
+            self._update_queue_depth()
+            response = await future
+
+        if 'error' in response:
+            self.metrics.errors += 1
+        if 'id' in request and 'id' not in response:
+            response = {'id': request['id'], **response}
+        self.metrics.latencies.append(time.perf_counter() - start)
+        return response
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        This function serves one connection; every request is performed by its own task so that a client can send
+        many requests without waiting for their responses
+
+        :param reader: the stream from which the requests are read
+        :param writer: the stream to which the responses are written
+        :return: None
+        """
+        tasks = set()
+
+        async def respond(request: dict) -> None:
+            write_frame(writer, await self.submit(request))
+            await writer.drain()
+
+        try:
+            while True:
+                try:
+                    request = await read_frame(reader)
+                except (ValueError, asyncio.IncompleteReadError) as error:
+                    write_frame(writer, {'error': f"{type(error).__name__}: {error}"})
+                    break
+                if request is None:
+                    break
+                if not isinstance(request, dict):
+                    write_frame(writer, {'error': "ValueError: A request must be a JSON object"})
+                    continue
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    def _update_queue_depth(self) -> None:
+        self.metrics.queue_depth = self._queue.qsize()
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.metrics.queue_depth)
+
+    async def _form_batches(self) -> None:
+        """
+        This function takes the queued requests in micro-batches and hands every batch to the worker processes
+
+        :return: None
+        """
+        while True:
+            pending = [await self._queue.get()]
+            while len(pending) < self.batch_size and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+
+            # a batch that is not full waits once for more requests to arrive
+            if len(pending) < self.batch_size and self.batch_window > 0:
+                await asyncio.sleep(self.batch_window)
+                while len(pending) < self.batch_size and not self._queue.empty():
+                    pending.append(self._queue.get_nowait())
+            self._update_queue_depth()
+
+            groups: dict[str, list] = {}
+            for request, future in pending:
+                groups.setdefault(request['scheme'], []).append((request, future))
+            for scheme, group in groups.items():
+                await self._slots.acquire()
+                asyncio.create_task(self._run_batch(scheme, group))
+
+    async def _run_batch(self, scheme: str, group: list) -> None:
+        """
+        This function runs a micro-batch of one scheme on the worker processes and resolves the futures of its requests
+
+        :param scheme: the name of the scheme
+        :param group: the requests of the batch with their futures
+        :return: None
+        """
+        try:
+            records = [{name: value for name, value in request.items() if name != 'scheme'} for request, _ in group]
+            keys = self.keys[scheme]
+            names = {record.get('key', 'default') for record in records}
+            needed = {name: keys[name] for name in names if name in keys}
+
+            self.metrics.batches += 1
+            self.metrics.batched_requests += len(records)
+            loop = asyncio.get_running_loop()
+            results, updated = await loop.run_in_executor(self._executor, process_batch, scheme, records, needed)
+
+            # only the keys this batch generated are stored, so that a key another batch generated meanwhile is not
+            # overwritten by the copy this batch was given
+            for name, key in updated.items():
+                if name not in needed or key != needed[name]:
+                    keys[name] = key
+        except Exception as error:
+            results = [{'error': f"{type(error).__name__}: {error}"}] * len(group)
+        finally:
+            self._slots.release()
+
+        # every future is resolved, whatever failed, so that no client waits forever
+        for (request, future), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+
+
+async def serve(service: EncryptionService, host: str = '127.0.0.1', port: int = 8765, path: str = None) -> None:
+    """
+    The function runs the service until it is cancelled
+
+    :param service: the service to be run
+    :param host: the address of the TCP socket
+    :param port: the port of the TCP socket
+    :param path: the path of a Unix socket, used instead of the TCP socket when given
+    :return: None
+    """
+    await service.start()
+    try:
+        if path:
+            server = await asyncio.start_unix_server(service.handle_connection, path)
+        else:
+            server = await asyncio.start_server(service.handle_connection, host, port)
+        async with server:
+            print(f"Serving on {path or f'{host}:{port}'} with {service.workers} worker processes", flush=True)
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+async def open_connection(host: str, port: int, path: str = None) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    This function connects to the service
+
+    :param host: the address of the TCP socket
+    :param port: the port of the TCP socket
+    :param path: the path of a Unix socket, used instead of the TCP socket when given
+    :return: the streams of the connection
+    """
+    if path:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+
+async def request(host: str, port: int, message: dict, path: str = None) -> dict:
+    """
+    This function sends one request on a new connection and waits for its response
+
+    :param host: the address of the TCP socket
+    :param port: the port of the TCP socket
+    :param message: the request
+    :param path: the path of a Unix socket, used instead of the TCP socket when given
+    :return: the response
+    """
+    reader, writer = await open_connection(host, port, path)
+    try:
+        write_frame(writer, message)
+        await writer.drain()
+        return await read_frame(reader)
+    finally:
+        writer.close()
+
+
+async def generate_load(host: str = '127.0.0.1', port: int = 8765, path: str = None, scheme: str = 'rsa',
+                        nu: int = 1024, clients: int = 8, requests: int = 1000, window: int = 16) -> dict:
+    """
+    The function is a load generator: it generates a key, then every client sends its share of encryption and
+    decryption requests, keeping up to window requests in flight, and measures their latencies
+
+    :param host: the address of the TCP socket
+    :param port: the port of the TCP socket
+    :param path: the path of a Unix socket, used instead of the TCP socket when given
+    :param scheme: the scheme, rsa or gm
+    :param nu: the security parameter of the key
+    :param clients: the number of concurrent connections
+    :param requests: the total number of requests
+    :param window: the largest number of requests in flight on one connection
+    :return: a dictionary with the requests per second, the median and 99th percentile latency in seconds, the number
+    of errors and the metrics reported by the service
+    """
+    name = f'load-{random.getrandbits(32):08x}'
+    key = await request(host, port, {'scheme': scheme, 'op': 'keygen', 'nu': nu, 'key': name}, path)
+    if 'error' in key:
+        raise RuntimeError(f"The keygen request failed: {key['error']}")
+    # a random element of Z/NZ for RSA, since the powers of 1 cost nothing; a bit for Goldwasser-Micali
+    plaintext = random.randrange(2, key['N']) if scheme == 'rsa' else 1
+    encryption = await request(host, port, {'scheme': scheme, 'op': 'encrypt', 'key': name, 'm': plaintext}, path)
+    ciphertext = encryption['c']
+
+    latencies = []
+    errors = 0
+
+    async def client(index: int, count: int) -> None:
+        nonlocal errors
+        reader, writer = await open_connection(host, port, path)
+        sent_at = {}
+        try:
+            for i in range(count):
+                # an even mix of encryptions and decryptions
+                message = {'id': i, 'scheme': scheme, 'key': name}
+                message.update({'op': 'encrypt', 'm': plaintext} if i % 2 == 0 else {'op': 'decrypt', 'c': ciphertext})
+                sent_at[i] = time.perf_counter()
+                write_frame(writer, message)
+                await writer.drain()
+                while len(sent_at) >= window or (i == count - 1 and sent_at):
+                    response = await read_frame(reader)
+                    latencies.append(time.perf_counter() - sent_at.pop(response['id']))
+                    errors += 'error' in response
+        finally:
+            writer.close()
+
+    shares = [requests // clients + (1 if i < requests % clients else 0) for i in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i, share) for i, share in enumerate(shares) if share))
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    metrics = await request(host, port, {'op': 'metrics'}, path)
+    return {
+        'requests_per_second': len(latencies) / seconds,
+        'latency_median': statistics.median(latencies),
+        'latency_p99': latencies[max(0, -(-99 * len(latencies) // 100) - 1)],
+        'errors': errors,
+        'service': metrics['metrics'],
+    }
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    This function is the entry point of the service and of its load generator
+
+    :param argv: the command line arguments without the program name
+    :return: the exit status
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the schemes over a local socket, or generate load for it.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    for command in ('serve', 'load'):
+        command_parser = commands.add_parser(command)
+        command_parser.add_argument('--host', default='127.0.0.1', help="the address of the TCP socket")
+        command_parser.add_argument('--port', type=int, default=8765, help="the port of the TCP socket")
+        command_parser.add_argument('--unix', help="the path of a Unix socket used instead of the TCP socket")
+        if command == 'serve':
+            command_parser.add_argument('--workers', type=int, default=0,
+                                        help="the number of worker processes; 0 for one per CPU")
+            command_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+            command_parser.add_argument('--batch-window', type=float, default=BATCH_WINDOW)
+        else:
+            command_parser.add_argument('--scheme', choices=('rsa', 'gm'), default='rsa')
+            command_parser.add_argument('--nu', type=int, default=1024)
+            command_parser.add_argument('--clients', type=int, default=8)
+            command_parser.add_argument('--requests', type=int, default=1000)
+            command_parser.add_argument('--window', type=int, default=16, help="the requests in flight per client")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        service = EncryptionService(args.workers, args.batch_size, args.batch_window)
+        try:
+            asyncio.run(serve(service, args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    result = asyncio.run(generate_load(args.host, args.port, args.unix, args.scheme, args.nu, args.clients,
+                                       args.requests, args.window))
+    print(f"{result['requests_per_second']:.1f} requests/s, median latency {result['latency_median'] * 1000:.2f} ms, "
+          f"p99 latency {result['latency_p99'] * 1000:.2f} ms, {result['errors']} errors")
+    service = result['service']
+    print(f"service: {service['requests']} requests, average batch size {service['average_batch_size']:.1f}, "
+          f"max queue depth {service['max_queue_depth']}")
+    return 1 if result['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
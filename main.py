@@ -1,7 +1,73 @@
-# This is a sample Python script.
+"""
+Command line entry point for the task programs and the tools built on the encryption_algorithms package.
 
-# Press Shift+F10 to execute it or replace it with your code.
-# Press Double Shift to search everywhere for classes, files, tool windows, actions, and settings
-#
-import as2634_task2
-# See PyCharm help at https://www.jetbrains.com/help/pycharm/
+    python main.py rsa        the Naive RSA program (task 1)
+    python main.py gm         the Goldwasser-Micali program (task 2)
+    python main.py rsa-cca    the IND-CCA demonstration for Naive RSA (task 4a)
+    python main.py gm-cca     the IND-CCA demonstration for Goldwasser-Micali (task 4b)
+    python main.py harness    the IND-CCA attack harness for Naive RSA, e.g. python main.py harness --keys 10
+    python main.py ind-cpa    the IND-CPA game simulator, e.g. python main.py ind-cpa --scheme gm --adversary jacobi
+    python main.py batch      the JSON lines batch mode, e.g. python main.py batch rsa operations.jsonl
+    python main.py benchmark  the benchmark suite, e.g. python main.py benchmark run --nu 512 1024
+    python main.py service    the asyncio encryption service, e.g. python main.py service serve --port 8765
+    python main.py stream     streaming RSA of files, e.g. python main.py stream encrypt --keystore keys.bin --key alice
+
+The arguments after the subcommand are passed on to it. Only the module of the chosen subcommand is imported.
+"""
+import importlib
+import sys
+
+# maps every subcommand to the module and function running it, and its description
+COMMANDS = {
+    'rsa': ('as2634_task1', 'main', 'the Naive RSA program (task 1)'),
+    'gm': ('as2634_task2', 'main', 'the Goldwasser-Micali program (task 2)'),
+    'rsa-cca': ('as2634_task4a', 'main', 'the IND-CCA demonstration for Naive RSA (task 4a)'),
+    'gm-cca': ('as2634_task4b', 'main', 'the IND-CCA demonstration for Goldwasser-Micali (task 4b)'),
+    'harness': ('encryption_algorithms.cca_harness', 'main', 'the IND-CCA attack harness for Naive RSA'),
+    'ind-cpa': ('encryption_algorithms.ind_cpa', 'main', 'the IND-CPA game simulator'),
+    'batch': ('encryption_algorithms.batch', 'main', 'the JSON lines batch mode'),
+    'benchmark': ('encryption_algorithms.benchmark', 'main', 'the benchmark suite'),
+    'service': ('encryption_algorithms.service', 'main', 'the asyncio encryption service and its load generator'),
+    'stream': ('encryption_algorithms.rsa_stream', 'main', 'streaming RSA encryption of a file or stdin'),
+}
+
+# the subcommands whose function takes the remaining arguments; the task programs read sys.argv themselves
+TAKES_ARGUMENTS = {'harness', 'ind-cpa', 'batch', 'benchmark', 'service', 'stream'}
+
+
+def print_usage() -> None:
+    """
+    The function prints the subcommands on console
+
+    :return: None
+    """
+    print('usage: python main.py <command> [arguments]\n\ncommands:')
+    for name, (module_name, function_name, description) in COMMANDS.items():
+        print(f'  {name:<10} {description}')
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    This function runs the subcommand named by the first argument
+
+    :param argv: the command line arguments without the program name
+    :return: the exit status
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print_usage()
+        return 0 if argv and argv[0] in ('-h', '--help') else 2
+
+    name, arguments = argv[0], argv[1:]
+    module_name, function_name, description = COMMANDS[name]
+    function = getattr(importlib.import_module(module_name), function_name)
+
+    if name in TAKES_ARGUMENTS:
+        return function(arguments)
+    sys.argv = [f'main.py {name}'] + arguments
+    function()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""
+Fixtures shared by the test modules.
+"""
+import pytest
+
+from encryption_algorithms import backend
+
+
+@pytest.fixture(params=list(backend.BACKENDS))
+def arithmetic(request):
+    """
+    The backend under test made the current one; the gmpy2 cases are skipped when gmpy2 is not installed
+    """
+    if request.param == 'gmpy2':
+        pytest.importorskip('gmpy2')
+    with backend.using(request.param) as current:
+        yield current
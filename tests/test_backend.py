@@ -0,0 +1,72 @@
+"""
+Checks that every arithmetic backend agrees with the reference backend and with known answers.
+"""
+import pytest
+
+from encryption_algorithms import backend, instrumentation
+
+
+def test_check_agreement(arithmetic):
+    assert backend.check_agreement([arithmetic.name], bits=(8, 64, 512, 1024), rounds=50) > 0
+
+
+@pytest.mark.parametrize('base, power, modulus, expected', [
+    (4, 13, 497, 445),
+    (2, 10, 1000, 24),
+    (3, -1, 7, 5),
+    (0, 0, 1, 0),
+    (5, 0, 7, 1),
+    (2, (1 << 127) - 2, (1 << 127) - 1, 1),
+])
+def test_modexp(arithmetic, base, power, modulus, expected):
+    assert arithmetic.modexp(base, power, modulus) == expected
+
+
+@pytest.mark.parametrize('a, n, expected', [(3, 7, 5), (17, 3120, 2753), (1, 2, 1), (10, 1, 0)])
+def test_modinv(arithmetic, a, n, expected):
+    assert arithmetic.modinv(a, n) == expected
+    assert type(arithmetic.modinv(a, n)) is int
+
+
+@pytest.mark.parametrize('a, n', [(6, 9), (0, 5), (4, 8)])
+def test_modinv_without_inverse(arithmetic, a, n):
+    with pytest.raises(ValueError):
+        arithmetic.modinv(a, n)
+
+
+@pytest.mark.parametrize('a, n, expected', [
+    (1001, 9907, -1),
+    (19, 45, 1),
+    (8, 21, -1),
+    (5, 21, 1),
+    (0, 1, 1),
+    (6, 9, 0),
+    (-1, 7, -1),
+    (-1, 5, 1),
+])
+def test_jacobi(arithmetic, a, n, expected):
+    assert arithmetic.jacobi(a, n) == expected
+
+
+@pytest.mark.parametrize('n', [2, 3, 97, 7919, (1 << 61) - 1, (1 << 127) - 1])
+def test_is_probable_prime_accepts_primes(arithmetic, n):
+    assert arithmetic.is_probable_prime(n, 20)
+
+
+# 1, even numbers, Carmichael numbers and strong pseudoprimes to small bases
+@pytest.mark.parametrize('n', [1, 4, 1 << 61, 561, 1105, 8911, 2047, 3215031751, ((1 << 61) - 1) * ((1 << 31) - 1)])
+def test_is_probable_prime_rejects_composites(arithmetic, n):
+    assert not arithmetic.is_probable_prime(n, 20)
+
+
+def test_is_probable_prime_counts_every_round_of_a_prime(arithmetic):
+    with instrumentation.recording() as recorder:
+        arithmetic.is_probable_prime((1 << 61) - 1, 20)
+    assert recorder.counters['primality_rounds'] == 20
+
+
+@pytest.mark.parametrize('n', [1 << 61, 8911])
+def test_is_probable_prime_counts_at_most_one_round_of_a_rejected_composite(arithmetic, n):
+    with instrumentation.recording() as recorder:
+        arithmetic.is_probable_prime(n, 20)
+    assert recorder.counters['primality_rounds'] <= 1
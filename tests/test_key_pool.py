@@ -0,0 +1,82 @@
+"""
+Checks that the key pool serves pre-generated keys and survives a failing Setup algorithm.
+"""
+import itertools
+import time
+
+import pytest
+
+from encryption_algorithms.key_pool import KeyPool
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    """
+    Waits until a condition on the pool holds, failing the test after timeout seconds
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail("The background thread did not refill the pool in time")
+        time.sleep(0.01)
+
+
+def test_warm_pool_serves_ready_keys():
+    counter = itertools.count()
+    with KeyPool(lambda nu: (nu, next(counter)), capacity=4, low_water_mark=1) as pool:
+        pool.warm(64)
+        wait_for(lambda: pool.statistics()['ready'][64] == 4)
+        assert pool.get(64) == (64, 0)
+        statistics = pool.statistics()
+    assert statistics['hits'] == 1 and statistics['misses'] == 0
+    assert statistics['refill_errors'] == 0 and statistics['last_error'] is None
+
+
+def test_failing_refill_is_recorded_and_the_thread_survives():
+    failures = [RuntimeError("no entropy")]
+
+    def generate_keypair(nu: int) -> int:
+        if failures:
+            raise failures.pop()
+        return nu
+
+    with KeyPool(generate_keypair, capacity=2, low_water_mark=0) as pool:
+        pool.warm(64)
+        wait_for(lambda: pool.statistics()['refill_errors'] == 1)
+        statistics = pool.statistics()
+        assert isinstance(statistics['last_error'], RuntimeError)
+        assert statistics['ready'][64] == 0
+
+        # the thread is still running: asking again fills the pool
+        pool.warm(64)
+        wait_for(lambda: pool.statistics()['ready'][64] == 2)
+        assert pool.get(64) == 64
+
+
+def test_get_raises_the_error_of_the_setup_algorithm_when_no_key_is_ready():
+    def generate_keypair(nu: int) -> int:
+        raise ValueError(f"nu = {nu} is too small")
+
+    with KeyPool(generate_keypair, capacity=2, low_water_mark=0) as pool:
+        with pytest.raises(ValueError):
+            pool.get(8)
+
+
+def test_failing_nu_is_not_retried_while_another_nu_is_refilled():
+    def generate_keypair(nu: int) -> int:
+        if nu == 64:
+            raise RuntimeError("no entropy")
+        return nu
+
+    # the background thread also wakes up every max_age seconds to replace expired keys
+    with KeyPool(generate_keypair, capacity=2, low_water_mark=0, max_age=0.1) as pool:
+        pool.warm(64)
+        wait_for(lambda: pool.statistics()['refill_errors'] == 1)
+
+        pool.warm(128)
+        wait_for(lambda: pool.statistics()['refills'] >= 2)
+        time.sleep(0.5)
+        assert pool.statistics()['refill_errors'] == 1
+
+        # asking for nu again retries it
+        pool.warm(64)
+        wait_for(lambda: pool.statistics()['refill_errors'] == 2)
@@ -0,0 +1,58 @@
+"""
+Checks the Jacobi symbol of every backend against its definition as a product of Legendre symbols.
+"""
+import pytest
+
+from encryption_algorithms import number_theory
+
+# every odd modulus below this bound is checked
+BOUND = 500
+
+
+def prime_factors(n: int) -> list[int]:
+    """
+    Factors n by trial division, every prime repeated as often as it divides n
+    """
+    factors, p = [], 2
+    while p * p <= n:
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+        p += 1
+    if n > 1:
+        factors.append(n)
+    return factors
+
+
+def legendre_symbol(a: int, p: int) -> int:
+    """
+    The Legendre symbol (a/p) of an odd prime p by Euler's criterion, computed with the built-in pow
+    """
+    value = pow(a, (p - 1) // 2, p)
+    return -1 if value == p - 1 else value
+
+
+def jacobi_reference(a: int, factors: list[int]) -> int:
+    """
+    The Jacobi symbol (a/n) as the product of the Legendre symbols of a over the prime factors of n
+    """
+    result = 1
+    for p in factors:
+        result *= legendre_symbol(a, p)
+    return result
+
+
+@pytest.mark.parametrize('n', range(1, BOUND, 2))
+def test_jacobi_symbol_is_the_product_of_legendre_symbols(arithmetic, n):
+    factors = prime_factors(n)
+    # the symbol depends on a mod n only, so the reference is computed once per residue
+    expected = [jacobi_reference(a, factors) for a in range(n)]
+    values = range(-n, 2 * n)
+    assert [number_theory.jacobi_symbol(a, n) for a in values] == [expected[a % n] for a in values]
+    assert number_theory.jacobi_symbols(values, n) == [expected[a % n] for a in values]
+
+
+@pytest.mark.parametrize('n', [0, -3, 2, 10])
+def test_jacobi_symbol_needs_a_positive_odd_modulus(n):
+    with pytest.raises(ValueError):
+        number_theory.jacobi_symbol(1, n)
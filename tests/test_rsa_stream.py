@@ -0,0 +1,66 @@
+"""
+Checks that streaming RSA decryption recovers the plaintext and rejects streams it cannot decrypt.
+"""
+import io
+import os
+
+import pytest
+
+from encryption_algorithms import rsa, rsa_stream
+from encryption_algorithms.modular_exponentiation import modular_exponentiation
+
+
+@pytest.fixture(scope='module')
+def keys():
+    """
+    Two RSA keys of the same size, so that their ciphertext streams have the same width
+    """
+    first = rsa.generate_keypair(512)
+    while True:
+        second = rsa.generate_keypair(512)
+        if rsa_stream.ciphertext_width(second.N) == rsa_stream.ciphertext_width(first.N):
+            return first, second
+
+
+def encrypt(data: bytes, private_key: rsa.RSAPrivateKey) -> bytes:
+    """
+    Encrypts data to a ciphertext stream under the public part of a key
+    """
+    destination = io.BytesIO()
+    rsa_stream.encrypt_stream(io.BytesIO(data), destination, private_key.e, private_key.N)
+    return destination.getvalue()
+
+
+def decrypt(stream: bytes, private_key: rsa.RSAPrivateKey) -> bytes:
+    """
+    Decrypts a ciphertext stream with a key
+    """
+    destination = io.BytesIO()
+    rsa_stream.decrypt_stream(io.BytesIO(stream), destination, private_key)
+    return destination.getvalue()
+
+
+@pytest.mark.parametrize('length', [0, 1, 62, 63, 64, 10000])
+def test_round_trip(keys, length):
+    data = os.urandom(length)
+    assert decrypt(encrypt(data, keys[0]), keys[0]) == data
+
+
+def test_wrong_key_of_the_same_width_is_rejected(keys):
+    # a few hundred blocks, so that some plaintext of the wrong key does not fit in a block
+    stream = encrypt(os.urandom(20000), keys[0])
+    with pytest.raises(ValueError):
+        decrypt(stream, keys[1])
+
+
+def test_corrupted_block_is_rejected(keys):
+    private_key = keys[0]
+    stream = bytearray(encrypt(os.urandom(1000), private_key))
+    width = rsa_stream.ciphertext_width(private_key.N)
+
+    # the first block replaced by a ciphertext of N - 1, which does not fit in a plaintext block
+    header = len(rsa_stream.MAGIC) + 4
+    stream[header:header + width] = modular_exponentiation(private_key.N - 1, private_key.e,
+                                                           private_key.N).to_bytes(width, 'big')
+    with pytest.raises(ValueError, match="not encrypted for this key"):
+        decrypt(bytes(stream), private_key)
@@ -0,0 +1,64 @@
+"""
+Checks that the encryption service answers every request of a micro-batch and keeps the newest keys.
+"""
+import asyncio
+
+from encryption_algorithms import rsa
+from encryption_algorithms.service import EncryptionService
+
+
+def run_with_service(scenario):
+    """
+    Runs a coroutine function on a started service with one worker process and closes the service afterwards
+    """
+    async def main():
+        service = EncryptionService(workers=1, batch_window=0.0)
+        await service.start()
+        try:
+            return await asyncio.wait_for(scenario(service), timeout=30)
+        finally:
+            await service.close()
+
+    return asyncio.run(main())
+
+
+def test_request_with_an_unhashable_key_gets_an_error():
+    async def scenario(service):
+        return await asyncio.gather(service.submit({'scheme': 'rsa', 'op': 'keygen', 'nu': 64, 'key': ['x']}),
+                                    service.submit({'scheme': 'rsa', 'op': 'keygen', 'nu': 64, 'id': 1}))
+
+    bad, good = run_with_service(scenario)
+    assert bad['error'].startswith('ValueError')
+    assert good['id'] == 1 and 'N' in good
+
+
+def test_failing_batch_resolves_every_future():
+    async def scenario(service):
+        loop = asyncio.get_running_loop()
+        group = [({'scheme': 'rsa', 'op': 'keygen', 'nu': 64, 'key': ['x']}, loop.create_future()),
+                 ({'scheme': 'rsa', 'op': 'keygen', 'nu': 64}, loop.create_future())]
+        await service._slots.acquire()
+        await service._run_batch('rsa', group)
+        return [future.result() for _, future in group]
+
+    results = run_with_service(scenario)
+    assert all(result['error'].startswith('TypeError') for result in results)
+
+
+def test_batch_does_not_overwrite_a_key_generated_meanwhile():
+    first, second = rsa.generate_keypair(64), rsa.generate_keypair(64)
+
+    async def scenario(service):
+        service.keys['rsa']['default'] = first
+        future = asyncio.get_running_loop().create_future()
+        await service._slots.acquire()
+        task = asyncio.create_task(service._run_batch('rsa', [({'scheme': 'rsa', 'op': 'encrypt', 'm': 5}, future)]))
+        # the batch has taken its copy of the key; another batch now regenerates it
+        await asyncio.sleep(0)
+        service.keys['rsa']['default'] = second
+        await task
+        return await future, service.keys['rsa']['default']
+
+    result, key = run_with_service(scenario)
+    assert result['c'] == pow(5, first.e, first.N)
+    assert key is second